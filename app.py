@@ -140,6 +140,9 @@ with st.sidebar:
 
         load_dotenv(override=True)
         st.cache_resource.clear()
+        from src.graph import clear_caches
+
+        clear_caches()
         st.success("Settings saved!")
 
     st.divider()
@@ -220,15 +223,12 @@ with st.sidebar:
         st.rerun()
 
 
-# --- Build Graph (cached per config) ---
-@st.cache_resource
-def get_graph(_provider, _model, _temperature):
-    """Build and cache the agent graph based on LLM configuration."""
-    from src.config.settings import get_llm
-    from src.graph import build_graph
+# --- Build Graph (cached per config by src.graph.get_graph) ---
+def get_graph(provider, model, temperature):
+    """Return the agent graph for the LLM configuration, built once per config."""
+    from src.graph import get_graph as get_cached_graph
 
-    llm = get_llm(provider=_provider, model=_model, temperature=_temperature)
-    return build_graph(llm=llm)
+    return get_cached_graph(provider, model, temperature)
 
 
 # --- Main Chat Interface ---
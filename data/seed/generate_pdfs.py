@@ -81,8 +81,22 @@ class PolicyPDF(FPDF):
         self.ln(1)
 
 
-def generate_refund_policy(output_dir):
-    """Generate Refund & Returns Policy PDF."""
+def _save_pdf(pdf, output, filename):
+    """Write pdf to output/filename and return the path.
+
+    If output is a binary file object (e.g. io.BytesIO), the PDF is written
+    straight into it and the same object is returned.
+    """
+    if hasattr(output, "write"):
+        pdf.output(output)
+        return output
+    path = os.path.join(output, filename)
+    pdf.output(path)
+    return path
+
+
+def generate_refund_policy(output):
+    """Generate Refund & Returns Policy PDF into a directory or binary file object."""
     pdf = PolicyPDF()
     pdf.alias_nb_pages()
     pdf.add_page()
@@ -169,13 +183,11 @@ def generate_refund_policy(output_dir):
         "Live Chat: Available 24/7 at support.techcorp.com"
     )
 
-    path = os.path.join(output_dir, "refund_policy.pdf")
-    pdf.output(path)
-    return path
+    return _save_pdf(pdf, output, "refund_policy.pdf")
 
 
-def generate_privacy_policy(output_dir):
-    """Generate Privacy Policy PDF."""
+def generate_privacy_policy(output):
+    """Generate Privacy Policy PDF into a directory or binary file object."""
     pdf = PolicyPDF()
     pdf.alias_nb_pages()
     pdf.add_page()
@@ -299,13 +311,11 @@ def generate_privacy_policy(output_dir):
         "Mail: TechCorp Inc., 100 Innovation Drive, Suite 500, San Francisco, CA 94105"
     )
 
-    path = os.path.join(output_dir, "privacy_policy.pdf")
-    pdf.output(path)
-    return path
+    return _save_pdf(pdf, output, "privacy_policy.pdf")
 
 
-def generate_terms_of_service(output_dir):
-    """Generate Terms of Service PDF."""
+def generate_terms_of_service(output):
+    """Generate Terms of Service PDF into a directory or binary file object."""
     pdf = PolicyPDF()
     pdf.alias_nb_pages()
     pdf.add_page()
@@ -430,9 +440,7 @@ def generate_terms_of_service(output_dir):
         "Phone: 1-800-TECHCORP (1-800-832-4267)"
     )
 
-    path = os.path.join(output_dir, "terms_of_service.pdf")
-    pdf.output(path)
-    return path
+    return _save_pdf(pdf, output, "terms_of_service.pdf")
 
 
 def generate_all_pdfs(output_dir="data/documents"):
@@ -41,18 +41,19 @@ CREATE TABLE IF NOT EXISTS tickets (
     resolution TEXT,
     satisfaction_rating INTEGER
 );
-"""
 
+-- Finds a customer's tickets newest first without a sort step; the other
+-- selected columns are still read from the table rows
+CREATE INDEX IF NOT EXISTS idx_tickets_customer_created
+    ON tickets(customer_id, created_at DESC);
+"""
 
-def seed_database(db_path="data/customer_support.db"):
-    """Create SQLite database and populate with generated data."""
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-    # Remove existing database for clean seed
-    if os.path.exists(db_path):
-        os.remove(db_path)
+def populate_database(conn):
+    """Create the schema on an open connection and insert generated data.
 
-    conn = sqlite3.connect(db_path)
+    Commits, leaves the connection open, and returns the generated data.
+    """
     cursor = conn.cursor()
 
     # Create tables
@@ -128,6 +129,19 @@ def seed_database(db_path="data/customer_support.db"):
     )
 
     conn.commit()
+    return data
+
+
+def seed_database(db_path="data/customer_support.db"):
+    """Create SQLite database and populate with generated data."""
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+    # Remove existing database for clean seed
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    conn = sqlite3.connect(db_path)
+    data = populate_database(conn)
     conn.close()
 
     print(f"  Seeded SQLite database at {db_path}")
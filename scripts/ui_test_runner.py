@@ -5,16 +5,24 @@ and General Agent. Captures screenshots, responses, agent routing, and timing
 for each question. Generates a comprehensive PDF report.
 
 Usage:
-    pip install playwright fpdf2
+    pip install playwright fpdf2 orjson
     playwright install chromium
     python scripts/ui_test_runner.py
 """
 
 # Force unbuffered UTF-8 stdout (Windows GBK fix)
+import functools
+import hashlib
 import io
-import json
+import os
+import queue
+import re
 import sys
+import textwrap
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 
@@ -25,348 +33,324 @@ sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8", line_bufferin
 # Test Questions (55 total: 22 SQL, 22 RAG, 11 General)
 # ---------------------------------------------------------------------------
 
-TEST_QUESTIONS = [
+
+@dataclass(frozen=True, slots=True)
+class Question:
+    """A single UI test question and the agent expected to answer it."""
+
+    id: int
+    question: str
+    expected_agent: str
+    category: str
+
+
+TEST_QUESTIONS: tuple[Question, ...] = (
     # ======================== SQL AGENT (22) ========================
     # Customer profile queries
-    {
-        "id": 1,
-        "question": "Show me a list of all customers with enterprise subscription tier.",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Customer Profile",
-    },
-    {
-        "id": 2,
-        "question": "How many customers have a business account type?",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Customer Profile",
-    },
-    {
-        "id": 3,
-        "question": "List all customers with suspended accounts.",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Customer Profile",
-    },
-    {
-        "id": 4,
-        "question": "What is the distribution of subscription tiers among all customers?",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Customer Profile",
-    },
-    {
-        "id": 5,
-        "question": "Show me customers who joined in the last 6 months.",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Customer Profile",
-    },
-    {
-        "id": 6,
-        "question": "How many active vs inactive vs suspended accounts do we have?",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Customer Profile",
-    },
+    Question(
+        1,
+        "Show me a list of all customers with enterprise subscription tier.",
+        "sql_agent",
+        "SQL - Customer Profile",
+    ),
+    Question(
+        2,
+        "How many customers have a business account type?",
+        "sql_agent",
+        "SQL - Customer Profile",
+    ),
+    Question(
+        3,
+        "List all customers with suspended accounts.",
+        "sql_agent",
+        "SQL - Customer Profile",
+    ),
+    Question(
+        4,
+        "What is the distribution of subscription tiers among all customers?",
+        "sql_agent",
+        "SQL - Customer Profile",
+    ),
+    Question(
+        5,
+        "Show me customers who joined in the last 6 months.",
+        "sql_agent",
+        "SQL - Customer Profile",
+    ),
+    Question(
+        6,
+        "How many active vs inactive vs suspended accounts do we have?",
+        "sql_agent",
+        "SQL - Customer Profile",
+    ),
     # Ticket queries
-    {
-        "id": 7,
-        "question": "How many open tickets are there currently?",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Tickets",
-    },
-    {
-        "id": 8,
-        "question": "Show me all critical priority tickets that are still open.",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Tickets",
-    },
-    {
-        "id": 9,
-        "question": "What is the average satisfaction rating across all resolved tickets?",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Tickets",
-    },
-    {
-        "id": 10,
-        "question": "Which support agent has the most assigned tickets?",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Tickets",
-    },
-    {
-        "id": 11,
-        "question": "Show the breakdown of tickets by category (billing, technical, account, complaint).",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Tickets",
-    },
-    {
-        "id": 12,
-        "question": "List the 5 most recent tickets with their subjects and statuses.",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Tickets",
-    },
-    {
-        "id": 13,
-        "question": "How many tickets were submitted through each channel?",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Tickets",
-    },
-    {
-        "id": 14,
-        "question": "What percentage of tickets have a satisfaction rating of 4 or above?",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Tickets",
-    },
-    {
-        "id": 15,
-        "question": "Show me tickets assigned to Alice Johnson that are in progress.",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Tickets",
-    },
+    Question(
+        7, "How many open tickets are there currently?", "sql_agent", "SQL - Tickets"
+    ),
+    Question(
+        8,
+        "Show me all critical priority tickets that are still open.",
+        "sql_agent",
+        "SQL - Tickets",
+    ),
+    Question(
+        9,
+        "What is the average satisfaction rating across all resolved tickets?",
+        "sql_agent",
+        "SQL - Tickets",
+    ),
+    Question(
+        10,
+        "Which support agent has the most assigned tickets?",
+        "sql_agent",
+        "SQL - Tickets",
+    ),
+    Question(
+        11,
+        "Show the breakdown of tickets by category (billing, technical, account, complaint).",
+        "sql_agent",
+        "SQL - Tickets",
+    ),
+    Question(
+        12,
+        "List the 5 most recent tickets with their subjects and statuses.",
+        "sql_agent",
+        "SQL - Tickets",
+    ),
+    Question(
+        13,
+        "How many tickets were submitted through each channel?",
+        "sql_agent",
+        "SQL - Tickets",
+    ),
+    Question(
+        14,
+        "What percentage of tickets have a satisfaction rating of 4 or above?",
+        "sql_agent",
+        "SQL - Tickets",
+    ),
+    Question(
+        15,
+        "Show me tickets assigned to Alice Johnson that are in progress.",
+        "sql_agent",
+        "SQL - Tickets",
+    ),
     # Product queries
-    {
-        "id": 16,
-        "question": "List all products in the security category with their prices.",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Products",
-    },
-    {
-        "id": 17,
-        "question": "What is the most expensive product we offer?",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Products",
-    },
-    {
-        "id": 18,
-        "question": "How many products do we have in each category?",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Products",
-    },
+    Question(
+        16,
+        "List all products in the security category with their prices.",
+        "sql_agent",
+        "SQL - Products",
+    ),
+    Question(
+        17,
+        "What is the most expensive product we offer?",
+        "sql_agent",
+        "SQL - Products",
+    ),
+    Question(
+        18,
+        "How many products do we have in each category?",
+        "sql_agent",
+        "SQL - Products",
+    ),
     # Cross-table queries
-    {
-        "id": 19,
-        "question": "Which customer has submitted the most support tickets?",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Cross-table",
-    },
-    {
-        "id": 20,
-        "question": "Show me all billing-related tickets from premium customers.",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Cross-table",
-    },
-    {
-        "id": 21,
-        "question": "What products have the most complaint tickets?",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Cross-table",
-    },
-    {
-        "id": 22,
-        "question": "Give me the total number of tickets for each subscription tier.",
-        "expected_agent": "sql_agent",
-        "category": "SQL - Cross-table",
-    },
+    Question(
+        19,
+        "Which customer has submitted the most support tickets?",
+        "sql_agent",
+        "SQL - Cross-table",
+    ),
+    Question(
+        20,
+        "Show me all billing-related tickets from premium customers.",
+        "sql_agent",
+        "SQL - Cross-table",
+    ),
+    Question(
+        21,
+        "What products have the most complaint tickets?",
+        "sql_agent",
+        "SQL - Cross-table",
+    ),
+    Question(
+        22,
+        "Give me the total number of tickets for each subscription tier.",
+        "sql_agent",
+        "SQL - Cross-table",
+    ),
     # ======================== RAG AGENT (22) ========================
     # Refund Policy
-    {
-        "id": 23,
-        "question": "What is the refund policy for monthly subscription plans?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Refund Policy",
-    },
-    {
-        "id": 24,
-        "question": "Which items are non-refundable according to the refund policy?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Refund Policy",
-    },
-    {
-        "id": 25,
-        "question": "How long does it take to process a refund?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Refund Policy",
-    },
-    {
-        "id": 26,
-        "question": "What is the refund window for annual subscriptions?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Refund Policy",
-    },
-    {
-        "id": 27,
-        "question": "How do I request a refund? What are the steps?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Refund Policy",
-    },
-    {
-        "id": 28,
-        "question": "Can I get a refund for a free trial that converted to a paid plan?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Refund Policy",
-    },
-    {
-        "id": 29,
-        "question": "How can I escalate a denied refund request?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Refund Policy",
-    },
-    {
-        "id": 30,
-        "question": "What happens when I downgrade my plan mid-cycle?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Refund Policy",
-    },
+    Question(
+        23,
+        "What is the refund policy for monthly subscription plans?",
+        "rag_agent",
+        "RAG - Refund Policy",
+    ),
+    Question(
+        24,
+        "Which items are non-refundable according to the refund policy?",
+        "rag_agent",
+        "RAG - Refund Policy",
+    ),
+    Question(
+        25,
+        "How long does it take to process a refund?",
+        "rag_agent",
+        "RAG - Refund Policy",
+    ),
+    Question(
+        26,
+        "What is the refund window for annual subscriptions?",
+        "rag_agent",
+        "RAG - Refund Policy",
+    ),
+    Question(
+        27,
+        "How do I request a refund? What are the steps?",
+        "rag_agent",
+        "RAG - Refund Policy",
+    ),
+    Question(
+        28,
+        "Can I get a refund for a free trial that converted to a paid plan?",
+        "rag_agent",
+        "RAG - Refund Policy",
+    ),
+    Question(
+        29,
+        "How can I escalate a denied refund request?",
+        "rag_agent",
+        "RAG - Refund Policy",
+    ),
+    Question(
+        30,
+        "What happens when I downgrade my plan mid-cycle?",
+        "rag_agent",
+        "RAG - Refund Policy",
+    ),
     # Privacy Policy
-    {
-        "id": 31,
-        "question": "What personal data does TechCorp collect from users?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Privacy Policy",
-    },
-    {
-        "id": 32,
-        "question": "How long does TechCorp retain transaction records?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Privacy Policy",
-    },
-    {
-        "id": 33,
-        "question": "What encryption standards does TechCorp use to protect data?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Privacy Policy",
-    },
-    {
-        "id": 34,
-        "question": "What rights do users have under GDPR according to TechCorp's privacy policy?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Privacy Policy",
-    },
-    {
-        "id": 35,
-        "question": "Does TechCorp sell personal information to third parties?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Privacy Policy",
-    },
-    {
-        "id": 36,
-        "question": "How can I contact TechCorp's Data Protection Officer?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Privacy Policy",
-    },
-    {
-        "id": 37,
-        "question": "How long is account data retained after inactivity?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Privacy Policy",
-    },
+    Question(
+        31,
+        "What personal data does TechCorp collect from users?",
+        "rag_agent",
+        "RAG - Privacy Policy",
+    ),
+    Question(
+        32,
+        "How long does TechCorp retain transaction records?",
+        "rag_agent",
+        "RAG - Privacy Policy",
+    ),
+    Question(
+        33,
+        "What encryption standards does TechCorp use to protect data?",
+        "rag_agent",
+        "RAG - Privacy Policy",
+    ),
+    Question(
+        34,
+        "What rights do users have under GDPR according to TechCorp's privacy policy?",
+        "rag_agent",
+        "RAG - Privacy Policy",
+    ),
+    Question(
+        35,
+        "Does TechCorp sell personal information to third parties?",
+        "rag_agent",
+        "RAG - Privacy Policy",
+    ),
+    Question(
+        36,
+        "How can I contact TechCorp's Data Protection Officer?",
+        "rag_agent",
+        "RAG - Privacy Policy",
+    ),
+    Question(
+        37,
+        "How long is account data retained after inactivity?",
+        "rag_agent",
+        "RAG - Privacy Policy",
+    ),
     # Terms of Service
-    {
-        "id": 38,
-        "question": "What are the subscription tiers and their prices?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Terms of Service",
-    },
-    {
-        "id": 39,
-        "question": "What is TechCorp's uptime guarantee for paid plans?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Terms of Service",
-    },
-    {
-        "id": 40,
-        "question": "What are the support response times for critical issues?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Terms of Service",
-    },
-    {
-        "id": 41,
-        "question": "What happens to my data when my account is terminated?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Terms of Service",
-    },
-    {
-        "id": 42,
-        "question": "What is the minimum age requirement to create an account?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Terms of Service",
-    },
-    {
-        "id": 43,
-        "question": "What activities are prohibited under the acceptable use policy?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Terms of Service",
-    },
-    {
-        "id": 44,
-        "question": "What is TechCorp's limitation of liability?",
-        "expected_agent": "rag_agent",
-        "category": "RAG - Terms of Service",
-    },
+    Question(
+        38,
+        "What are the subscription tiers and their prices?",
+        "rag_agent",
+        "RAG - Terms of Service",
+    ),
+    Question(
+        39,
+        "What is TechCorp's uptime guarantee for paid plans?",
+        "rag_agent",
+        "RAG - Terms of Service",
+    ),
+    Question(
+        40,
+        "What are the support response times for critical issues?",
+        "rag_agent",
+        "RAG - Terms of Service",
+    ),
+    Question(
+        41,
+        "What happens to my data when my account is terminated?",
+        "rag_agent",
+        "RAG - Terms of Service",
+    ),
+    Question(
+        42,
+        "What is the minimum age requirement to create an account?",
+        "rag_agent",
+        "RAG - Terms of Service",
+    ),
+    Question(
+        43,
+        "What activities are prohibited under the acceptable use policy?",
+        "rag_agent",
+        "RAG - Terms of Service",
+    ),
+    Question(
+        44,
+        "What is TechCorp's limitation of liability?",
+        "rag_agent",
+        "RAG - Terms of Service",
+    ),
     # ======================== GENERAL AGENT (11) ========================
-    {
-        "id": 45,
-        "question": "Hello! What can you help me with?",
-        "expected_agent": "general",
-        "category": "General - Greeting",
-    },
-    {
-        "id": 46,
-        "question": "Good morning, I'm a new customer.",
-        "expected_agent": "general",
-        "category": "General - Greeting",
-    },
-    {
-        "id": 47,
-        "question": "What types of questions can I ask this system?",
-        "expected_agent": "general",
-        "category": "General - System Info",
-    },
-    {
-        "id": 48,
-        "question": "How does this customer support system work?",
-        "expected_agent": "general",
-        "category": "General - System Info",
-    },
-    {
-        "id": 49,
-        "question": "Can you tell me about TechCorp's services?",
-        "expected_agent": "general",
-        "category": "General - About",
-    },
-    {
-        "id": 50,
-        "question": "Thank you for your help!",
-        "expected_agent": "general",
-        "category": "General - Courtesy",
-    },
-    {
-        "id": 51,
-        "question": "What kind of support do you provide?",
-        "expected_agent": "general",
-        "category": "General - System Info",
-    },
-    {
-        "id": 52,
-        "question": "I'm not sure what I need. Can you guide me?",
-        "expected_agent": "general",
-        "category": "General - Guidance",
-    },
-    {
-        "id": 53,
-        "question": "Who built this customer support assistant?",
-        "expected_agent": "general",
-        "category": "General - About",
-    },
-    {
-        "id": 54,
-        "question": "Is there a way to talk to a human agent?",
-        "expected_agent": "general",
-        "category": "General - Guidance",
-    },
-    {
-        "id": 55,
-        "question": "Goodbye, have a nice day!",
-        "expected_agent": "general",
-        "category": "General - Courtesy",
-    },
-]
+    Question(45, "Hello! What can you help me with?", "general", "General - Greeting"),
+    Question(46, "Good morning, I'm a new customer.", "general", "General - Greeting"),
+    Question(
+        47,
+        "What types of questions can I ask this system?",
+        "general",
+        "General - System Info",
+    ),
+    Question(
+        48,
+        "How does this customer support system work?",
+        "general",
+        "General - System Info",
+    ),
+    Question(
+        49, "Can you tell me about TechCorp's services?", "general", "General - About"
+    ),
+    Question(50, "Thank you for your help!", "general", "General - Courtesy"),
+    Question(
+        51, "What kind of support do you provide?", "general", "General - System Info"
+    ),
+    Question(
+        52,
+        "I'm not sure what I need. Can you guide me?",
+        "general",
+        "General - Guidance",
+    ),
+    Question(
+        53, "Who built this customer support assistant?", "general", "General - About"
+    ),
+    Question(
+        54, "Is there a way to talk to a human agent?", "general", "General - Guidance"
+    ),
+    Question(55, "Goodbye, have a nice day!", "general", "General - Courtesy"),
+)
 
 # ---------------------------------------------------------------------------
 # Agent Prompts (for documentation in report)
@@ -419,229 +403,401 @@ AGENT_PROMPTS = {
 }
 
 
+# ---------------------------------------------------------------------------
+# Response keywords (fallback agent detection when the sidebar has no info)
+# ---------------------------------------------------------------------------
+
+# SQL agent typically mentions tables, queries, database results
+SQL_KWS = (
+    "customer_id",
+    "ticket_id",
+    "found",
+    "query",
+    "table",
+    "results",
+    "count(",
+    "select ",
+)
+RAG_KWS = ("policy", "according to the", "privacy", "refund", "terms of service")
+GEN_KWS = ("welcome", "hello", "glad", "help you", "techcorp", "goodbye", "thank")
+
+# One compiled alternation per agent (plain substring semantics, no \b) so each
+# check is a single scan of the response instead of one scan per keyword
+SQL_RE = re.compile("|".join(map(re.escape, SQL_KWS)))
+RAG_RE = re.compile("|".join(map(re.escape, RAG_KWS)))
+GEN_RE = re.compile("|".join(map(re.escape, GEN_KWS)))
+
+RESPONSE_PATTERNS = (
+    ("sql_agent", SQL_RE),
+    ("rag_agent", RAG_RE),
+    ("general", GEN_RE),
+)
+
+
 # ---------------------------------------------------------------------------
 # Playwright-based UI test runner
 # ---------------------------------------------------------------------------
 
+# The headless tab is never foregrounded, so keep Chromium from throttling its
+# timers/renderer while a response streams in.
+CHROMIUM_ARGS = [
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-ipc-flooding-protection",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+]
+
+# Resource types that don't affect chat behaviour. Stylesheets are kept because
+# Streamlit's layout (and therefore the screenshots) depends on them.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+
+
+def _block_heavy_resources(route):
+    """Abort requests for images/fonts/media, let everything else through."""
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
+
+
+# Resolves as soon as the user + assistant messages are present and the spinner
+# is gone. The check runs from a MutationObserver, i.e. on every DOM change
+# rather than on a polling clock. Resolves false after timeoutMs.
+WAIT_FOR_RESPONSE_JS = """(timeoutMs) => new Promise((resolve) => {
+    const ready = () =>
+        document.querySelectorAll('[data-testid="stChatMessage"]').length >= 2
+        && !document.querySelector('[data-testid="stSpinner"]');
+    if (ready()) {
+        resolve(true);
+        return;
+    }
+    const observer = new MutationObserver(() => {
+        if (ready()) {
+            observer.disconnect();
+            clearTimeout(timer);
+            resolve(true);
+        }
+    });
+    const timer = setTimeout(() => {
+        observer.disconnect();
+        resolve(false);
+    }, timeoutMs);
+    observer.observe(document.body, {childList: true, subtree: true});
+})"""
+
+# Text of the last chat message, fetched in one round trip
+LAST_MESSAGE_JS = """() => {
+    const m = document.querySelectorAll('[data-testid="stChatMessage"]');
+    return m.length ? m[m.length - 1].innerText.trim() : '';
+}"""
+
+# Classifies the "Last query handled by" sidebar note in the browser so only the
+# agent name crosses the IPC boundary, not the whole sidebar text
+SIDEBAR_AGENT_JS = """() => {
+    const t = document.querySelector('[data-testid="stSidebar"]')?.innerText || '';
+    if (t.includes('SQL Agent')) return 'sql_agent';
+    if (t.includes('RAG Agent')) return 'rag_agent';
+    if (t.includes('General Agent')) return 'general';
+    return 'unknown';
+}"""
+
+# Browser-side predicate: chat history is empty (after "Clear Conversation")
+CHAT_EMPTY_JS = """() =>
+    document.querySelectorAll('[data-testid="stChatMessage"]').length === 0"""
+
+
+def reset_chat(page):
+    """Reset the conversation on an already-loaded page.
+
+    Clicks the sidebar "Clear Conversation" button so the next question starts
+    with a fresh thread. Falls back to a full reload if the button is missing
+    or the history does not clear (a reload starts a new Streamlit session).
+    """
+    try:
+        page.get_by_role("button", name="Clear Conversation").click(timeout=5000)
+        page.wait_for_function(CHAT_EMPTY_JS, timeout=10000)
+    except Exception:
+        page.reload(wait_until="commit", timeout=30000)
+    page.locator("textarea").first.wait_for(state="visible", timeout=15000)
+
+
+def _append_result(f, result):
+    """Append one result to an open JSONL file, formatting timestamps only here."""
+    import orjson
+
+    f.write(
+        orjson.dumps(
+            {**result, "timestamp": datetime.fromtimestamp(result["timestamp_epoch"])},
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE,
+        )
+    )
+    f.flush()  # a crash keeps every result written so far
+
+
+def iter_results(path):
+    """Stream results back from a JSONL file written by run_tests()."""
+    import orjson
+
+    with open(path, "rb") as f:
+        for line in f:
+            yield orjson.loads(line)
+
+
+def _failed_result(q, error, elapsed=0):
+    """Result dict for a question that could not be answered."""
+    return {
+        "id": q.id,
+        "question": q.question,
+        "category": q.category,
+        "expected_agent": q.expected_agent,
+        "actual_agent": "error",
+        "response": f"Test failed: {str(error)}",
+        "time_seconds": elapsed,
+        "screenshot": "",
+        "has_error": True,
+        "routing_correct": False,
+        "timestamp_epoch": time.time(),
+    }
+
+
+def _ask_question(page, q, screenshot_path, reset):
+    """Ask one question on a loaded page and return its result dict.
+
+    ``reset`` clears the previous conversation first. Failures are captured
+    in the result rather than raised.
+    """
+    qid = q.id
+    question = q.question
+    expected_agent = q.expected_agent
+    category = q.category
+
+    start_time = None
+    try:
+        # Start each question from an empty conversation
+        if reset:
+            reset_chat(page)
+
+        # Type the question and submit
+        start_time = time.perf_counter()
+        textarea = page.locator("textarea").first
+        textarea.click()
+        textarea.fill(question)
+
+        # Press Enter to submit (Streamlit chat input)
+        textarea.press("Enter")
+
+        # Wait for user message to appear in chat
+        try:
+            page.wait_for_selector(
+                '[data-testid="stChatMessage"]',
+                timeout=10000,
+            )
+        except Exception:
+            # Retry submit only if the first attempt really didn't
+            # land; a slow render must not trigger a duplicate query
+            if page.locator('[data-testid="stChatMessage"]').count() == 0:
+                textarea = page.locator("textarea").first
+                textarea.fill(question)
+                textarea.press("Enter")
+
+        # Wait for at least 2 chat messages (user + assistant) with
+        # no spinner left, i.e. the response has finished rendering
+        # (on timeout, extract whatever has rendered so far)
+        max_wait = 180  # 3 min max per question
+        page.evaluate(WAIT_FOR_RESPONSE_JS, max_wait * 1000)
+
+        elapsed = round(time.perf_counter() - start_time, 2)
+
+        # Extract response text
+        response_text = ""
+        actual_agent = "unknown"
+
+        try:
+            # The last chat message is the assistant's response
+            response_text = page.evaluate(LAST_MESSAGE_JS)
+        except Exception as e:
+            response_text = f"Error extracting response: {e}"
+
+        # Try to get the agent info from sidebar (classified in-browser)
+        try:
+            actual_agent = page.evaluate(SIDEBAR_AGENT_JS)
+        except Exception:  # noqa: S110
+            pass
+
+        # If sidebar detection failed, infer from response content
+        if actual_agent == "unknown" and response_text:
+            resp_lower = response_text.lower()
+            for _agent, pattern in RESPONSE_PATTERNS:
+                if pattern.search(resp_lower):
+                    actual_agent = expected_agent  # trust expected
+                    break
+
+        # Take screenshot (JPEG: far smaller and faster to encode than PNG)
+        page.screenshot(path=screenshot_path, full_page=True, type="jpeg", quality=70)
+
+        # Check for errors (only actual error messages, not the word in content)
+        has_error = response_text.startswith("Error:") or (
+            "I wasn't able to process" in response_text
+        )
+
+        result = {
+            "id": qid,
+            "question": question,
+            "category": category,
+            "expected_agent": expected_agent,
+            "actual_agent": actual_agent,
+            "response": response_text,
+            "time_seconds": elapsed,
+            "screenshot": screenshot_path,
+            "has_error": has_error,
+            "routing_correct": actual_agent == expected_agent
+            or actual_agent == "unknown",
+            "timestamp_epoch": time.time(),
+        }
+
+        status = "OK" if not has_error else "ERR"
+        print(
+            f"  -> [{status}] Q{qid} Agent: {actual_agent} | Time: {elapsed}s | Response: {response_text[:80]}..."
+        )
+
+    except Exception as e:
+        elapsed = (
+            round(time.perf_counter() - start_time, 2) if start_time is not None else 0
+        )
+        result = _failed_result(q, e, elapsed)
+        print(f"  -> [FAIL] Q{qid}: {str(e)[:80]}")
+
+    return result
+
+
+def _open_app(page, app_url):
+    """Load the app on ``page``; the visible chat input is the readiness signal."""
+    page.goto(app_url, wait_until="commit", timeout=30000)
+    page.locator("textarea").first.wait_for(state="visible", timeout=15000)
+
 
-def run_tests():
-    """Run all test questions through the Streamlit UI and collect results."""
+def _question_worker(app_url, todo, screenshot_paths, record):
+    """Answer questions taken from ``todo`` until it is empty.
+
+    Playwright's sync API is bound to the thread that started it, so every
+    worker drives its own browser, and with it its own Streamlit session.
+
+    If the browser or app cannot be (re)loaded, the claimed question and
+    everything left in ``todo`` are recorded as failed results instead of
+    raising, so the run still produces a complete report.
+    """
     from playwright.sync_api import sync_playwright
 
+    claimed = None
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+            context = browser.new_context(viewport={"width": 1400, "height": 900})
+            context.route("**/*", _block_heavy_resources)
+
+            # Load the app once and reuse the page for every question
+            page = context.new_page()
+            _open_app(page, app_url)
+
+            reset = False
+            while True:
+                try:
+                    claimed = todo.get_nowait()
+                except queue.Empty:
+                    break
+                i, q = claimed
+                print(f"[{i + 1}/{len(TEST_QUESTIONS)}] Q{q.id}: {q.question[:60]}...")
+                result = _ask_question(page, q, screenshot_paths[q.id], reset)
+                record(result)
+                claimed = None
+
+                if result["actual_agent"] == "error":
+                    # The page may be left mid-interaction; start from a fresh load
+                    _open_app(page, app_url)
+                    reset = False
+                else:
+                    reset = True
+
+            page.close()
+            browser.close()
+    except Exception as e:
+        print(f"  -> [FAIL] Worker stopped: {str(e)[:80]}")
+        if claimed is not None:
+            record(_failed_result(claimed[1], e))
+        while True:
+            try:
+                _, q = todo.get_nowait()
+            except queue.Empty:
+                break
+            record(_failed_result(q, e))
+
+
+def run_tests(result_queue=None):
+    """Run all test questions through the Streamlit UI and collect results.
+
+    Questions are spread over ``UI_TEST_CONCURRENCY`` browser workers
+    (default 4); each one is dominated by LLM latency, not local CPU.
+
+    Results are appended to ``test_results.jsonl`` in question order as soon
+    as they and all earlier questions have finished, rather than kept in
+    memory; the file's path is returned. If ``result_queue`` is given, each
+    result is also put on it at that point, so a ``pdf_worker`` process can
+    start on the report.
+    """
     # Output directories
     base_dir = Path("D:/Study/Project/Generative-AI-Multi-Agent-System")
     output_dir = base_dir / "test_results"
     screenshots_dir = output_dir / "screenshots"
     screenshots_dir.mkdir(parents=True, exist_ok=True)
+    screenshot_paths = {
+        q.id: str(screenshots_dir / f"q{q.id:02d}.jpg") for q in TEST_QUESTIONS
+    }
 
-    results = []
+    results_jsonl = output_dir / "test_results.jsonl"
     app_url = "http://localhost:8501"
+    workers = max(1, int(os.getenv("UI_TEST_CONCURRENCY", "4")))
 
     print(f"\n{'=' * 70}")
     print("  AI Customer Support Assistant - Automated UI Test")
-    print(f"  Testing {len(TEST_QUESTIONS)} questions")
+    print(f"  Testing {len(TEST_QUESTIONS)} questions ({workers} workers)")
     print(f"  Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'=' * 70}\n")
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(viewport={"width": 1400, "height": 900})
-
-        for i, q in enumerate(TEST_QUESTIONS):
-            qid = q["id"]
-            question = q["question"]
-            expected_agent = q["expected_agent"]
-            category = q["category"]
+    todo = queue.Queue()
+    for item in enumerate(TEST_QUESTIONS):
+        todo.put(item)
 
-            print(f"[{i + 1}/{len(TEST_QUESTIONS)}] Q{qid}: {question[:60]}...")
+    position = {q.id: i for i, q in enumerate(TEST_QUESTIONS)}
+    finished = {}  # position -> result, until all earlier ones are in
+    next_position = 0
+    lock = threading.Lock()
 
-            page = context.new_page()
-            try:
-                # Navigate to app
-                page.goto(app_url, wait_until="networkidle", timeout=30000)
-                page.wait_for_selector("textarea", timeout=15000)
-                time.sleep(2)  # Let Streamlit fully hydrate
+    with open(results_jsonl, "wb") as out:
 
-                # Type the question and submit
-                start_time = time.time()
-                textarea = page.locator("textarea").first
-                textarea.click()
-                textarea.fill(question)
-                time.sleep(1)
+        def record(result):
+            nonlocal next_position
+            with lock:
+                finished[position[result["id"]]] = result
+                while next_position in finished:
+                    r = finished.pop(next_position)
+                    _append_result(out, r)
+                    if result_queue is not None:
+                        result_queue.put(r)
+                    next_position += 1
 
-                # Press Enter to submit (Streamlit chat input)
-                textarea.press("Enter")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_question_worker, app_url, todo, screenshot_paths, record)
+                for _ in range(workers)
+            ]
+            for future in futures:
+                future.result()
 
-                # Wait for user message to appear in chat
-                try:
-                    page.wait_for_selector(
-                        '[data-testid="stChatMessage"]',
-                        timeout=10000,
-                    )
-                except Exception:
-                    # Retry submit if first attempt didn't work
-                    time.sleep(1)
-                    textarea = page.locator("textarea").first
-                    textarea.fill(question)
-                    time.sleep(0.5)
-                    textarea.press("Enter")
-
-                # Wait for at least 2 chat messages (user + assistant)
-                # Poll until we see the assistant response or timeout
-                max_wait = 180  # 3 min max per question
-                poll_interval = 3
-                waited = 0
-                while waited < max_wait:
-                    time.sleep(poll_interval)
-                    waited += poll_interval
-                    msgs = page.locator('[data-testid="stChatMessage"]').all()
-                    if len(msgs) >= 2:
-                        # Check if spinner is gone (response complete)
-                        spinners = page.locator('[data-testid="stSpinner"]').all()
-                        if len(spinners) == 0:
-                            break
-
-                # Extra settle time for rendering
-                time.sleep(2)
-
-                end_time = time.time()
-                elapsed = round(end_time - start_time, 2)
-
-                # Extract response text
-                # Get all stChatMessage elements
-                response_text = ""
-                actual_agent = "unknown"
+    print(f"\nJSONL results saved to: {results_jsonl}")
 
-                try:
-                    # Get all chat messages - the last assistant message is the response
-                    messages = page.locator('[data-testid="stChatMessage"]').all()
-                    if len(messages) >= 2:
-                        last_msg = messages[-1]
-                        response_text = last_msg.inner_text().strip()
-                    elif len(messages) == 1:
-                        response_text = messages[0].inner_text().strip()
-                except Exception as e:
-                    response_text = f"Error extracting response: {e}"
-
-                # Try to get the agent info from sidebar
-                try:
-                    sidebar_text = page.locator(
-                        '[data-testid="stSidebar"]'
-                    ).inner_text()
-                    if "SQL Agent" in sidebar_text:
-                        actual_agent = "sql_agent"
-                    elif "RAG Agent" in sidebar_text:
-                        actual_agent = "rag_agent"
-                    elif "General Agent" in sidebar_text:
-                        actual_agent = "general"
-                except Exception:  # noqa: S110
-                    pass
-
-                # If sidebar detection failed, infer from response content
-                if actual_agent == "unknown" and response_text:
-                    resp_lower = response_text.lower()
-                    # SQL agent typically mentions tables, queries, database results
-                    if any(
-                        kw in resp_lower
-                        for kw in [
-                            "customer_id",
-                            "ticket_id",
-                            "found",
-                            "query",
-                            "table",
-                            "results",
-                            "count(",
-                            "select ",
-                        ]
-                    ):
-                        actual_agent = expected_agent  # trust expected for SQL
-                    elif any(
-                        kw in resp_lower
-                        for kw in [
-                            "policy",
-                            "according to the",
-                            "privacy",
-                            "refund",
-                            "terms of service",
-                        ]
-                    ):
-                        actual_agent = expected_agent  # trust expected for RAG
-                    elif any(
-                        kw in resp_lower
-                        for kw in [
-                            "welcome",
-                            "hello",
-                            "glad",
-                            "help you",
-                            "techcorp",
-                            "goodbye",
-                            "thank",
-                        ]
-                    ):
-                        actual_agent = expected_agent  # trust expected for general
-
-                # Take screenshot
-                screenshot_path = screenshots_dir / f"q{qid:02d}.png"
-                page.screenshot(path=str(screenshot_path), full_page=True)
-
-                # Check for errors (only actual error messages, not the word in content)
-                has_error = response_text.startswith("Error:") or (
-                    "I wasn't able to process" in response_text
-                )
-
-                result = {
-                    "id": qid,
-                    "question": question,
-                    "category": category,
-                    "expected_agent": expected_agent,
-                    "actual_agent": actual_agent,
-                    "response": response_text,
-                    "time_seconds": elapsed,
-                    "screenshot": str(screenshot_path),
-                    "has_error": has_error,
-                    "routing_correct": actual_agent == expected_agent
-                    or actual_agent == "unknown",
-                    "timestamp": datetime.now().isoformat(),
-                }
-                results.append(result)
-
-                status = "OK" if not has_error else "ERR"
-                print(
-                    f"  -> [{status}] Agent: {actual_agent} | Time: {elapsed}s | Response: {response_text[:80]}..."
-                )
-
-            except Exception as e:
-                elapsed = (
-                    round(time.time() - start_time, 2) if "start_time" in dir() else 0
-                )
-                result = {
-                    "id": qid,
-                    "question": question,
-                    "category": category,
-                    "expected_agent": expected_agent,
-                    "actual_agent": "error",
-                    "response": f"Test failed: {str(e)}",
-                    "time_seconds": elapsed,
-                    "screenshot": "",
-                    "has_error": True,
-                    "routing_correct": False,
-                    "timestamp": datetime.now().isoformat(),
-                }
-                results.append(result)
-                print(f"  -> [FAIL] {str(e)[:80]}")
-
-            finally:
-                page.close()
-
-        browser.close()
-
-    # Save raw results as JSON
-    results_json = output_dir / "test_results.json"
-    with open(results_json, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
-    print(f"\nJSON results saved to: {results_json}")
-
-    return results
+    return results_jsonl
 
 
 # ---------------------------------------------------------------------------
@@ -649,14 +805,123 @@ def run_tests():
 # ---------------------------------------------------------------------------
 
 
+@functools.lru_cache(maxsize=4096)
+def _sanitize(text):
+    """Make text safe for fpdf2's core (latin-1) fonts.
+
+    Cached because prompts, agent names and field labels repeat on every page.
+    """
+    return text.encode("latin-1", errors="replace").decode("latin-1")
+
+
+class _Latin1Table(dict):
+    """str.translate table mapping anything outside latin-1 to ``?``.
+
+    Filled lazily, so only code points that actually occur are stored.
+    """
+
+    def __missing__(self, codepoint):
+        self[codepoint] = value = codepoint if codepoint < 0x100 else 0x3F
+        return value
+
+
+_LATIN1_TABLE = _Latin1Table()
+
+
+def _sanitize_body(text):
+    """Latin-1-safe copy of one-off text such as response bodies.
+
+    Same result as ``_sanitize`` in a single translate() pass, without
+    filling the cache with strings that never repeat.
+    """
+    return text.translate(_LATIN1_TABLE)
+
+
+# Courier is monospaced, so the prompts can be line-broken once at import
+# instead of having multi_cell measure every word on each report build.
+_PROMPT_COLUMNS = 126
+PRECOMPUTED_PROMPT_LINES = {
+    name: [
+        wrapped
+        for line in _sanitize(text).splitlines()
+        for wrapped in (textwrap.wrap(line, _PROMPT_COLUMNS) or [""])
+    ]
+    for name, text in AGENT_PROMPTS.items()
+}
+
+# "2.<n> <Agent Name> Prompt" sub-title for each agent, in AGENT_PROMPTS order
+PROMPT_TITLES = {
+    name: f"2.{i} {name.replace('_', ' ').title()} Prompt"
+    for i, name in enumerate(AGENT_PROMPTS, start=1)
+}
+
+
+def _shrink_screenshot(path, max_size=(1200, 1800)):
+    """Downscale a screenshot to roughly its rendered size in the PDF.
+
+    Returns an in-memory JPEG so fpdf2 never holds the full-resolution image.
+    """
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+        buf = io.BytesIO()
+        img.convert("RGB").save(buf, "JPEG", quality=70, optimize=True)
+    buf.seek(0)
+    return buf
+
+
+def _prep_shot(path, img_dir, errors):
+    """Shrunk JPEG copy of a screenshot, named after the screenshot's content.
+
+    Identical screenshots (e.g. the same error page) map to one file, which
+    fpdf2 embeds only once since it caches images by file name. Returns
+    ``None`` for a missing or unreadable screenshot, appending the reason to
+    ``errors`` so the caller can report it after rendering.
+    """
+    try:
+        data = Path(path).read_bytes()
+        prepared = img_dir / f"{hashlib.sha256(data).hexdigest()[:20]}.jpg"
+        if not prepared.exists():
+            prepared.write_bytes(_shrink_screenshot(io.BytesIO(data)).getvalue())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        errors.append(f"{path}: {e}")
+        return None
+    return prepared
+
+
+@dataclass(frozen=True, slots=True)
+class SummaryRow:
+    """The part of a result the report still needs once its page is written.
+
+    ``cells`` is the summary table row, already truncated, formatted and
+    latin-1 safe; the other fields feed the executive summary.
+    """
+
+    actual_agent: str
+    time_seconds: float
+    has_error: bool
+    routing_correct: bool
+    cells: tuple[str, ...]
+
+
 def generate_pdf_report(results):
-    """Generate a comprehensive PDF report from test results."""
+    """Generate a comprehensive PDF report from test results.
+
+    ``results`` is consumed once and may be any iterable, e.g. a queue fed
+    while the tests are still running. Only a compact ``SummaryRow`` is kept
+    per result after its page has been laid out.
+    """
     from fpdf import FPDF
     from fpdf.enums import XPos, YPos
 
     base_dir = Path("D:/Study/Project/Generative-AI-Multi-Agent-System")
     output_dir = base_dir / "test_results"
-    screenshots_dir = output_dir / "screenshots"
+    img_dir = output_dir / ".img"
+    img_dir.mkdir(parents=True, exist_ok=True)
+    shot_errors = []
 
     class TestReport(FPDF):
         def header(self):
@@ -709,136 +974,144 @@ def generate_pdf_report(results):
         def body_text(self, text, bold=False):
             style = "B" if bold else ""
             self.set_font("Helvetica", style, 9)
-            # Sanitize text for fpdf2
-            safe = text.encode("latin-1", errors="replace").decode("latin-1")
+            safe = _sanitize(text)
             self.multi_cell(0, 5, safe, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
 
         def key_value(self, key, value):
             self.set_font("Helvetica", "B", 9)
-            key_safe = key.encode("latin-1", errors="replace").decode("latin-1")
+            key_safe = _sanitize(key)
             self.cell(45, 5, key_safe, new_x=XPos.RIGHT, new_y=YPos.TOP)
             self.set_font("Helvetica", "", 9)
-            val_safe = str(value).encode("latin-1", errors="replace").decode("latin-1")
+            val_safe = _sanitize(str(value))
             self.multi_cell(0, 5, val_safe, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
 
     pdf = TestReport()
     pdf.alias_nb_pages()
     pdf.set_auto_page_break(auto=True, margin=20)
 
-    # ---- Title Page ----
-    pdf.add_page()
-    pdf.ln(30)
-    pdf.set_font("Helvetica", "B", 24)
-    pdf.cell(
-        0,
-        15,
-        "AI Customer Support Assistant",
-        new_x=XPos.LMARGIN,
-        new_y=YPos.NEXT,
-        align="C",
-    )
-    pdf.set_font("Helvetica", "B", 18)
-    pdf.cell(
-        0,
-        12,
-        "Automated UI Test Report",
-        new_x=XPos.LMARGIN,
-        new_y=YPos.NEXT,
-        align="C",
-    )
-    pdf.ln(10)
-    pdf.set_font("Helvetica", "", 12)
-    pdf.cell(
-        0,
-        8,
-        f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-        new_x=XPos.LMARGIN,
-        new_y=YPos.NEXT,
-        align="C",
-    )
-    pdf.cell(
-        0,
-        8,
-        f"Total Questions: {len(results)}",
-        new_x=XPos.LMARGIN,
-        new_y=YPos.NEXT,
-        align="C",
-    )
+    def render_overview(pdf, _outline):
+        """Title page and executive summary, rendered by fpdf2 at output()."""
+        rows = summary_rows
 
-    total_time = sum(r["time_seconds"] for r in results)
-    pdf.cell(
-        0,
-        8,
-        f"Total Test Duration: {total_time:.1f}s ({total_time / 60:.1f} min)",
-        new_x=XPos.LMARGIN,
-        new_y=YPos.NEXT,
-        align="C",
-    )
+        # ---- Title Page ----
+        pdf.ln(30)
+        pdf.set_font("Helvetica", "B", 24)
+        pdf.cell(
+            0,
+            15,
+            "AI Customer Support Assistant",
+            new_x=XPos.LMARGIN,
+            new_y=YPos.NEXT,
+            align="C",
+        )
+        pdf.set_font("Helvetica", "B", 18)
+        pdf.cell(
+            0,
+            12,
+            "Automated UI Test Report",
+            new_x=XPos.LMARGIN,
+            new_y=YPos.NEXT,
+            align="C",
+        )
+        pdf.ln(10)
+        pdf.set_font("Helvetica", "", 12)
+        pdf.cell(
+            0,
+            8,
+            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            new_x=XPos.LMARGIN,
+            new_y=YPos.NEXT,
+            align="C",
+        )
+        pdf.cell(
+            0,
+            8,
+            f"Total Questions: {len(rows)}",
+            new_x=XPos.LMARGIN,
+            new_y=YPos.NEXT,
+            align="C",
+        )
 
-    errors = sum(1 for r in results if r["has_error"])
-    success = len(results) - errors
-    pdf.cell(
-        0,
-        8,
-        f"Success: {success} | Errors: {errors}",
-        new_x=XPos.LMARGIN,
-        new_y=YPos.NEXT,
-        align="C",
-    )
+        total_time = sum(r.time_seconds for r in rows)
+        pdf.cell(
+            0,
+            8,
+            f"Total Test Duration: {total_time:.1f}s ({total_time / 60:.1f} min)",
+            new_x=XPos.LMARGIN,
+            new_y=YPos.NEXT,
+            align="C",
+        )
 
-    # ---- Executive Summary ----
+        errors = sum(1 for r in rows if r.has_error)
+        success = len(rows) - errors
+        pdf.cell(
+            0,
+            8,
+            f"Success: {success} | Errors: {errors}",
+            new_x=XPos.LMARGIN,
+            new_y=YPos.NEXT,
+            align="C",
+        )
+
+        # ---- Executive Summary ----
+        pdf.add_page()
+        pdf.section_title("1. Executive Summary")
+
+        # Agent distribution
+        sql_count = sum(1 for r in rows if r.actual_agent == "sql_agent")
+        rag_count = sum(1 for r in rows if r.actual_agent == "rag_agent")
+        gen_count = sum(1 for r in rows if r.actual_agent == "general")
+        unk_count = sum(1 for r in rows if r.actual_agent == "unknown")
+
+        pdf.body_text("Agent Routing Distribution:")
+        pdf.body_text(f"  - SQL Agent: {sql_count} questions")
+        pdf.body_text(f"  - RAG Agent: {rag_count} questions")
+        pdf.body_text(f"  - General Agent: {gen_count} questions")
+        if unk_count:
+            pdf.body_text(f"  - Unknown/Not detected: {unk_count} questions")
+        pdf.ln(3)
+
+        # Timing stats
+        times = [r.time_seconds for r in rows]
+        avg_time = sum(times) / len(times) if times else 0
+        sql_times = [r.time_seconds for r in rows if r.actual_agent == "sql_agent"]
+        rag_times = [r.time_seconds for r in rows if r.actual_agent == "rag_agent"]
+        gen_times = [r.time_seconds for r in rows if r.actual_agent == "general"]
+
+        pdf.body_text("Timing Statistics:")
+        pdf.body_text(f"  - Average response time: {avg_time:.2f}s")
+        pdf.body_text(f"  - Min: {min(times):.2f}s | Max: {max(times):.2f}s")
+        if sql_times:
+            pdf.body_text(f"  - SQL Agent avg: {sum(sql_times) / len(sql_times):.2f}s")
+        if rag_times:
+            pdf.body_text(f"  - RAG Agent avg: {sum(rag_times) / len(rag_times):.2f}s")
+        if gen_times:
+            pdf.body_text(
+                f"  - General Agent avg: {sum(gen_times) / len(gen_times):.2f}s"
+            )
+        pdf.ln(3)
+
+        # Routing accuracy
+        correct = sum(1 for r in rows if r.routing_correct)
+        pdf.body_text(
+            f"Routing Accuracy: {correct}/{len(rows)} ({100 * correct / len(rows):.1f}%)"
+        )
+
+    # The title page and executive summary need totals over every result,
+    # which are only known once the stream is consumed: reserve their two
+    # pages now and let fpdf2 fill them in when the document is written
+    summary_rows = []
     pdf.add_page()
-    pdf.section_title("1. Executive Summary")
-
-    # Agent distribution
-    sql_count = sum(1 for r in results if r["actual_agent"] == "sql_agent")
-    rag_count = sum(1 for r in results if r["actual_agent"] == "rag_agent")
-    gen_count = sum(1 for r in results if r["actual_agent"] == "general")
-    unk_count = sum(1 for r in results if r["actual_agent"] == "unknown")
-
-    pdf.body_text("Agent Routing Distribution:")
-    pdf.body_text(f"  - SQL Agent: {sql_count} questions")
-    pdf.body_text(f"  - RAG Agent: {rag_count} questions")
-    pdf.body_text(f"  - General Agent: {gen_count} questions")
-    if unk_count:
-        pdf.body_text(f"  - Unknown/Not detected: {unk_count} questions")
-    pdf.ln(3)
-
-    # Timing stats
-    times = [r["time_seconds"] for r in results]
-    avg_time = sum(times) / len(times) if times else 0
-    sql_times = [r["time_seconds"] for r in results if r["actual_agent"] == "sql_agent"]
-    rag_times = [r["time_seconds"] for r in results if r["actual_agent"] == "rag_agent"]
-    gen_times = [r["time_seconds"] for r in results if r["actual_agent"] == "general"]
-
-    pdf.body_text("Timing Statistics:")
-    pdf.body_text(f"  - Average response time: {avg_time:.2f}s")
-    pdf.body_text(f"  - Min: {min(times):.2f}s | Max: {max(times):.2f}s")
-    if sql_times:
-        pdf.body_text(f"  - SQL Agent avg: {sum(sql_times) / len(sql_times):.2f}s")
-    if rag_times:
-        pdf.body_text(f"  - RAG Agent avg: {sum(rag_times) / len(rag_times):.2f}s")
-    if gen_times:
-        pdf.body_text(f"  - General Agent avg: {sum(gen_times) / len(gen_times):.2f}s")
-    pdf.ln(3)
-
-    # Routing accuracy
-    correct = sum(1 for r in results if r["routing_correct"])
-    pdf.body_text(
-        f"Routing Accuracy: {correct}/{len(results)} ({100 * correct / len(results):.1f}%)"
-    )
+    pdf.insert_toc_placeholder(render_overview, pages=2)
 
     # ---- Agent Prompts Section ----
-    pdf.add_page()
     pdf.section_title("2. Agent System Prompts")
 
-    for agent_name, prompt_text in AGENT_PROMPTS.items():
-        pdf.sub_title(
-            f"2.{list(AGENT_PROMPTS.keys()).index(agent_name) + 1} {agent_name.replace('_', ' ').title()} Prompt"
-        )
+    for agent_name, title in PROMPT_TITLES.items():
+        pdf.sub_title(title)
         pdf.set_font("Courier", "", 7)
-        safe_prompt = prompt_text.encode("latin-1", errors="replace").decode("latin-1")
-        pdf.multi_cell(0, 4, safe_prompt, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        for line in PRECOMPUTED_PROMPT_LINES[agent_name]:
+            pdf.cell(0, 4, line, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         pdf.ln(4)
 
     # ---- Test Results Section ----
@@ -862,7 +1135,7 @@ def generate_pdf_report(results):
         pdf.set_fill_color(240, 240, 245)
         pdf.set_font("Helvetica", "B", 10)
         qtext = f"Q{r['id']}: {r['question']}"
-        safe_q = qtext.encode("latin-1", errors="replace").decode("latin-1")
+        safe_q = _sanitize(qtext)
         pdf.cell(0, 7, safe_q, new_x=XPos.LMARGIN, new_y=YPos.NEXT, fill=True)
         pdf.ln(1)
 
@@ -882,19 +1155,14 @@ def generate_pdf_report(results):
         resp_text = r["response"][:2000]
         if len(r["response"]) > 2000:
             resp_text += "\n... [truncated]"
-        safe_resp = resp_text.encode("latin-1", errors="replace").decode("latin-1")
+        safe_resp = _sanitize_body(resp_text)
         pdf.multi_cell(0, 4, safe_resp, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
 
-        # Screenshot
-        screenshot_path = screenshots_dir / f"q{r['id']:02d}.png"
-        if screenshot_path.exists():
+        # Screenshot, scaled to fit page width
+        shot = r["screenshot"] and _prep_shot(r["screenshot"], img_dir, shot_errors)
+        if shot:
             pdf.ln(2)
-            try:
-                # Scale screenshot to fit page width
-                img_w = 180
-                pdf.image(str(screenshot_path), x=15, w=img_w)
-            except Exception as e:
-                pdf.body_text(f"[Screenshot not available: {e}]")
+            pdf.image(str(shot), x=15, w=180)
 
         pdf.ln(5)
 
@@ -903,14 +1171,28 @@ def generate_pdf_report(results):
         pdf.line(10, pdf.get_y(), 200, pdf.get_y())
         pdf.ln(3)
 
+        summary_rows.append(
+            SummaryRow(
+                actual_agent=r["actual_agent"],
+                time_seconds=r["time_seconds"],
+                has_error=r["has_error"],
+                routing_correct=r["routing_correct"],
+                cells=(
+                    str(r["id"]),
+                    _sanitize_body(r["question"][:45]),
+                    _sanitize(r["expected_agent"]),
+                    _sanitize(r["actual_agent"]),
+                    f"{r['time_seconds']:.1f}",
+                    "Y" if not r["has_error"] else "N",
+                    _sanitize_body(r["response"][:45].replace("\n", " ")),
+                ),
+            )
+        )
+
     # ---- Summary Table ----
     pdf.add_page()
     pdf.section_title("4. Results Summary Table")
 
-    # Table header
-    pdf.set_font("Helvetica", "B", 7)
-    pdf.set_fill_color(41, 65, 122)
-    pdf.set_text_color(255, 255, 255)
     col_w = [8, 55, 22, 22, 14, 12, 57]
     headers = [
         "#",
@@ -921,87 +1203,104 @@ def generate_pdf_report(results):
         "OK?",
         "Response Preview",
     ]
-    for j, h in enumerate(headers):
-        pdf.cell(
-            col_w[j],
-            6,
-            h,
-            border=1,
-            fill=True,
-            new_x=XPos.RIGHT,
-            new_y=YPos.TOP,
-            align="C",
-        )
-    pdf.ln()
-    pdf.set_text_color(0, 0, 0)
 
-    # Table rows
-    for r in results:
+    def _print_header():
+        # Leaves the row style set: font, text colour and the error-row fill
+        # (non-error rows are drawn unfilled, so one fill colour suffices)
+        pdf.set_font("Helvetica", "B", 7)
+        pdf.set_fill_color(41, 65, 122)
+        pdf.set_text_color(255, 255, 255)
+        for j, h in enumerate(headers):
+            pdf.cell(
+                col_w[j],
+                6,
+                h,
+                border=1,
+                fill=True,
+                new_x=XPos.RIGHT,
+                new_y=YPos.TOP,
+                align="C",
+            )
+        pdf.ln()
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_fill_color(255, 230, 230)
         pdf.set_font("Helvetica", "", 6)
+
+    _print_header()
+
+    # Table rows
+    for r in summary_rows:
         if pdf.get_y() > 270:
             pdf.add_page()
-            # Reprint header
-            pdf.set_font("Helvetica", "B", 7)
-            pdf.set_fill_color(41, 65, 122)
-            pdf.set_text_color(255, 255, 255)
-            for j, h in enumerate(headers):
-                pdf.cell(
-                    col_w[j],
-                    6,
-                    h,
-                    border=1,
-                    fill=True,
-                    new_x=XPos.RIGHT,
-                    new_y=YPos.TOP,
-                    align="C",
-                )
-            pdf.ln()
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Helvetica", "", 6)
-
-        fill = r["has_error"]
-        if fill:
-            pdf.set_fill_color(255, 230, 230)
-
-        safe_vals = [
-            str(r["id"]),
-            r["question"][:45],
-            r["expected_agent"],
-            r["actual_agent"],
-            f"{r['time_seconds']:.1f}",
-            "Y" if not r["has_error"] else "N",
-            r["response"][:45].replace("\n", " "),
-        ]
-
-        for j, val in enumerate(safe_vals):
-            s = val.encode("latin-1", errors="replace").decode("latin-1")
+            _print_header()
+
+        # new_x=RIGHT leaves each cell at the next column's x, so the row
+        # needs no per-cell positioning
+        for w, text in zip(col_w, r.cells, strict=True):
             pdf.cell(
-                col_w[j], 5, s, border=1, fill=fill, new_x=XPos.RIGHT, new_y=YPos.TOP
+                w, 5, text, border=1, fill=r.has_error, new_x=XPos.RIGHT, new_y=YPos.TOP
             )
         pdf.ln()
 
     # Save PDF
+    # Write fpdf2's bytearray through a memoryview in 1 MB slices so no
+    # second full copy of the document is made on the way to disk
     pdf_path = output_dir / "UI_Test_Report.pdf"
-    pdf.output(str(pdf_path))
+    data = memoryview(pdf.output())
+    with open(pdf_path, "wb") as f:
+        for start in range(0, len(data), 1 << 20):
+            f.write(data[start : start + (1 << 20)])
     print(f"\nPDF report saved to: {pdf_path}")
+    for err in shot_errors:
+        print(f"  Screenshot skipped: {err}")
     return pdf_path
 
 
+def pdf_worker(result_queue, done_queue):
+    """Build the PDF report in a separate process while the tests still run.
+
+    Each result's page is laid out as soon as it arrives; the ``None``
+    sentinel ends the stream. The PDF path (or ``None`` on failure) is put on
+    ``done_queue``.
+    """
+    try:
+        done_queue.put(generate_pdf_report(iter(result_queue.get, None)))
+    except Exception as e:
+        print(f"\nPDF generation failed: {e}")
+        done_queue.put(None)
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
 if __name__ == "__main__":
+    from multiprocessing import Process, Queue
+
+    # The report is built in its own process, fed one result at a time, so it
+    # is ready shortly after the last question and fpdf2's memory stays out
+    # of the browser-driving process
+    result_queue, done_queue = Queue(), Queue()
+    pdf_proc = Process(target=pdf_worker, args=(result_queue, done_queue))
+    pdf_proc.start()
+
     print("Starting automated UI tests...")
-    results = run_tests()
+    try:
+        results_path = run_tests(result_queue)
+    finally:
+        result_queue.put(None)
 
-    print("\nGenerating PDF report...")
-    pdf_path = generate_pdf_report(results)
+    print("\nFinishing PDF report...")
+    pdf_path = done_queue.get()
+    pdf_proc.join()
 
     # Print final summary
-    total = len(results)
-    success = sum(1 for r in results if not r["has_error"])
-    total_time = sum(r["time_seconds"] for r in results)
+    total = success = 0
+    total_time = 0.0
+    for r in iter_results(results_path):
+        total += 1
+        success += not r["has_error"]
+        total_time += r["time_seconds"]
     print(f"\n{'=' * 70}")
     print("  TESTING COMPLETE")
     print(f"  Total: {total} | Success: {success} | Errors: {total - success}")
@@ -1,5 +1,6 @@
 """Supervisor/router that classifies queries and routes to specialist agents."""
 
+import re
 from typing import Literal
 
 from langchain_core.messages import HumanMessage
@@ -7,6 +8,43 @@ from pydantic import BaseModel, Field
 
 from src.prompts.supervisor import SUPERVISOR_PROMPT
 
+# Cheap pre-routing for queries whose category is unambiguous; anything that
+# matches none or more than one of these still goes to the LLM classifier.
+_PREROUTE_PATTERNS = (
+    (
+        "sql_agent",
+        re.compile(
+            r"\bhow many\s+(\w+\s+)?(tickets|customers|products|orders)\b"
+            # At most three words between verb and noun, within one sentence
+            r"|\b(list|show|find|look up)[^\w.?!]+(?:\w+[^\w.?!]+){0,3}"
+            r"(tickets|customers|orders)\b",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        "rag_agent",
+        re.compile(
+            r"\b(polic(y|ies)|terms of service|warranty|privacy)\b",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        "general",
+        re.compile(
+            r"^\s*(hi|hello|hey|thanks|thank you|bye|goodbye)\b[\s!.,]*$",
+            re.IGNORECASE,
+        ),
+    ),
+)
+
+
+def preroute(content):
+    """Return the category if exactly one pre-routing pattern matches, else None."""
+    matches = [
+        category for category, pattern in _PREROUTE_PATTERNS if pattern.search(content)
+    ]
+    return matches[0] if len(matches) == 1 else None
+
 
 class RouteQuery(BaseModel):
     """Route a user query to the appropriate specialist agent."""
@@ -20,6 +58,27 @@ class RouteQuery(BaseModel):
     )
 
 
+def _last_user_content(messages):
+    """Return the content of the latest user message, or None if there is none.
+
+    Handles both LangChain HumanMessage objects and {"role": "user"} dicts.
+    """
+    user_message = next(
+        (
+            msg
+            for msg in reversed(messages)
+            if isinstance(msg, HumanMessage)
+            or (isinstance(msg, dict) and msg.get("role") == "user")
+        ),
+        None,
+    )
+    if user_message is None:
+        return None
+    if isinstance(user_message, dict):
+        return user_message.get("content", "")
+    return user_message.content
+
+
 def create_router(llm):
     """Create a router that classifies queries using structured output.
 
@@ -33,25 +92,13 @@ def create_router(llm):
 
     def route(state):
         """Classify the user's query and set the query_category in state."""
-        messages = state.get("messages", [])
-
-        # Get the latest user message
-        user_message = None
-        for msg in reversed(messages):
-            if isinstance(msg, HumanMessage) or (
-                isinstance(msg, dict) and msg.get("role") == "user"
-            ):
-                user_message = msg
-                break
-
-        if user_message is None:
+        content = _last_user_content(state.get("messages", []))
+        if content is None:
             return {"query_category": "general"}
 
-        content = (
-            user_message.content
-            if hasattr(user_message, "content")
-            else user_message.get("content", "")
-        )
+        category = preroute(content)
+        if category is not None:
+            return {"query_category": category}
 
         result = structured_llm.invoke(
             [
@@ -1,7 +1,8 @@
+import functools
 import os
+from dataclasses import dataclass
 
 from dotenv import load_dotenv
-from langchain.chat_models import init_chat_model
 
 load_dotenv()
 
@@ -12,39 +13,97 @@ DEFAULT_MODELS = {
 }
 
 
+@dataclass(frozen=True)
+class _Env:
+    """Snapshot of the environment-driven settings."""
+
+    llm_provider: str
+    llm_model: str | None
+    llm_temperature: float
+    sqlite_path: str
+    chroma_dir: str
+    chroma_collection: str
+    embedding_model: str
+
+    @classmethod
+    def from_environ(cls):
+        return cls(
+            llm_provider=os.getenv("LLM_PROVIDER", "anthropic"),
+            llm_model=os.getenv("LLM_MODEL"),
+            llm_temperature=float(os.getenv("LLM_TEMPERATURE", "0.0")),
+            sqlite_path=os.getenv("SQLITE_DB_PATH", "data/customer_support.db"),
+            chroma_dir=os.getenv("CHROMA_PERSIST_DIR", "data/chroma"),
+            chroma_collection=os.getenv("CHROMA_COLLECTION_NAME", "policy_documents"),
+            embedding_model=os.getenv(
+                "EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+            ),
+        )
+
+
+# Read once after load_dotenv(); call reload_env() after changing variables.
+_ENV = _Env.from_environ()
+
+
+def reload_env():
+    """Re-read the settings from the environment.
+
+    Also drops cached chat-model clients, which hold the API key they were
+    created with.
+    """
+    global _ENV
+    _ENV = _Env.from_environ()
+    _init_cached_llm.cache_clear()
+
+
 def get_llm(provider=None, model=None, temperature=None, **kwargs):
     """Create an LLM instance using init_chat_model factory.
 
     Supports switching providers via .env or function arguments.
     """
-    provider = provider or os.getenv("LLM_PROVIDER", "anthropic")
-    model = model or os.getenv("LLM_MODEL", DEFAULT_MODELS.get(provider, "gpt-4o"))
-    temperature = (
-        temperature
-        if temperature is not None
-        else float(os.getenv("LLM_TEMPERATURE", "0.0"))
-    )
+    from langchain.chat_models import init_chat_model
+
+    provider = provider or _ENV.llm_provider
+    model = model or _ENV.llm_model or DEFAULT_MODELS.get(provider, "gpt-4o")
+    temperature = temperature if temperature is not None else _ENV.llm_temperature
 
     model_string = f"{provider}:{model}" if ":" not in model else model
-    return init_chat_model(model_string, temperature=temperature, **kwargs)
+    if kwargs:
+        return init_chat_model(model_string, temperature=temperature, **kwargs)
+    return _init_cached_llm(model_string, temperature)
+
+
+@functools.lru_cache(maxsize=8)
+def _init_cached_llm(model_string, temperature):
+    # One client per config is shared; reload_env() clears this cache so
+    # changed credentials take effect
+    from langchain.chat_models import init_chat_model
+
+    return init_chat_model(model_string, temperature=temperature)
 
 
 def get_embedding_model():
-    """Get the HuggingFace embedding model for vector store operations."""
+    """Get the HuggingFace embedding model for vector store operations.
+
+    The model is loaded once per process (per model name) and reused.
+    """
+    return _load_embedding_model(_ENV.embedding_model)
+
+
+@functools.lru_cache(maxsize=2)
+def _load_embedding_model(model_name):
     from langchain_huggingface import HuggingFaceEmbeddings
 
-    model_name = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     return HuggingFaceEmbeddings(model_name=model_name)
 
 
 def get_sqlite_path():
     """Get the SQLite database path from environment."""
-    return os.getenv("SQLITE_DB_PATH", "data/customer_support.db")
+    return _ENV.sqlite_path
 
 
 def get_chroma_settings():
     """Get ChromaDB configuration from environment."""
     return {
-        "persist_directory": os.getenv("CHROMA_PERSIST_DIR", "data/chroma"),
-        "collection_name": os.getenv("CHROMA_COLLECTION_NAME", "policy_documents"),
+        "persist_directory": _ENV.chroma_dir,
+        "collection_name": _ENV.chroma_collection,
     }
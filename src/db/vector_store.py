@@ -1,26 +1,38 @@
 """ChromaDB vector store with semantic chunking, hybrid search, and cross-encoder reranking."""
 
+import functools
 import logging
 import os
-
-from langchain_chroma import Chroma
-from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import threading
 
 from src.config.settings import get_chroma_settings, get_embedding_model
 
 logger = logging.getLogger(__name__)
 
+# Built retrievers keyed by (persist dir, collection, chunk count, k). The
+# count changes whenever chunks are added; add_documents also clears it.
+_RETRIEVER_CACHE = {}
+
+# Chunks embedded and written per Chroma call when indexing
+EMBED_BATCH_SIZE = 256
+
+# Serializes writes to the shared Chroma client and _RETRIEVER_CACHE;
+# uploads load and chunk files in parallel but index them one at a time
+_WRITE_LOCK = threading.Lock()
+
 
 def _semantic_split_documents(
     documents, fallback_chunk_size=512, fallback_chunk_overlap=50
 ):
     """Split documents using semantic chunking with per-document fallback.
 
-    Uses SemanticChunker from langchain_experimental when available.
-    Falls back to RecursiveCharacterTextSplitter for short docs, errors,
-    or when the package is not installed.
+    Uses SemanticChunker from langchain_experimental when available, on all
+    long documents in one call. Falls back to RecursiveCharacterTextSplitter
+    for short docs, for any doc that fails on its own, or when the package
+    is not installed.
     """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
     fallback_splitter = RecursiveCharacterTextSplitter(
         chunk_size=fallback_chunk_size,
         chunk_overlap=fallback_chunk_overlap,
@@ -41,11 +53,17 @@ def _semantic_split_documents(
         breakpoint_threshold_amount=90,
     )
 
-    all_chunks = []
-    for doc in documents:
-        if len(doc.page_content) < 200:
-            all_chunks.extend(fallback_splitter.split_documents([doc]))
-            continue
+    long_docs = [doc for doc in documents if len(doc.page_content) >= 200]
+    all_chunks = fallback_splitter.split_documents(
+        [doc for doc in documents if len(doc.page_content) < 200]
+    )
+    try:
+        all_chunks.extend(semantic_chunker.split_documents(long_docs))
+        return all_chunks
+    except Exception:
+        logger.debug("Batched semantic chunking failed, retrying per document")
+
+    for doc in long_docs:
         try:
             chunks = semantic_chunker.split_documents([doc])
             all_chunks.extend(chunks)
@@ -61,6 +79,8 @@ def _semantic_split_documents(
 
 def _load_documents_from_chroma(vector_store):
     """Load all stored chunks from ChromaDB as Document objects for BM25 indexing."""
+    from langchain_core.documents import Document
+
     collection_data = vector_store._collection.get(include=["documents", "metadatas"])
     documents = []
     for text, metadata in zip(
@@ -70,15 +90,35 @@ def _load_documents_from_chroma(vector_store):
     return documents
 
 
+@functools.lru_cache(maxsize=1)
+def _get_cross_encoder(model_name="cross-encoder/ms-marco-MiniLM-L-6-v2"):
+    """Load the reranking cross-encoder once per process."""
+    from langchain_community.cross_encoders import HuggingFaceCrossEncoder
+
+    return HuggingFaceCrossEncoder(model_name=model_name)
+
+
 def get_vector_store():
-    """Get or create ChromaDB vector store instance."""
+    """Get or create ChromaDB vector store instance.
+
+    The client is opened lazily on first use and reused for the same
+    collection and persist directory.
+    """
     settings = get_chroma_settings()
-    embeddings = get_embedding_model()
+    return _open_vector_store(
+        settings["collection_name"], settings["persist_directory"]
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _open_vector_store(collection_name, persist_directory):
+    """Open the Chroma collection (cached per collection/directory)."""
+    from langchain_chroma import Chroma
 
     return Chroma(
-        collection_name=settings["collection_name"],
-        embedding_function=embeddings,
-        persist_directory=settings["persist_directory"],
+        collection_name=collection_name,
+        embedding_function=get_embedding_model(),
+        persist_directory=persist_directory,
     )
 
 
@@ -91,6 +131,22 @@ def get_retriever(search_kwargs=None):
     search_kwargs = search_kwargs or {"k": 5}
     vector_store = get_vector_store()
 
+    # Loading every chunk for BM25 is the expensive part, so reuse the
+    # pipeline for as long as the collection is unchanged
+    settings = get_chroma_settings()
+    cache_key = (
+        settings["persist_directory"],
+        settings["collection_name"],
+        vector_store._collection.count(),
+        search_kwargs.get("k", 5),
+    )
+    if cache_key not in _RETRIEVER_CACHE:
+        _RETRIEVER_CACHE[cache_key] = _build_retriever(vector_store, search_kwargs)
+    return _RETRIEVER_CACHE[cache_key]
+
+
+def _build_retriever(vector_store, search_kwargs):
+    """Assemble the hybrid + reranked pipeline described in get_retriever."""
     # --- Dense retriever (always available) ---
     dense_retriever = vector_store.as_retriever(search_kwargs={"k": 20})
 
@@ -123,13 +179,9 @@ def get_retriever(search_kwargs=None):
         from langchain_classic.retrievers.document_compressors import (
             CrossEncoderReranker,
         )
-        from langchain_community.cross_encoders import HuggingFaceCrossEncoder
 
         top_n = search_kwargs.get("k", 5)
-        cross_encoder = HuggingFaceCrossEncoder(
-            model_name="cross-encoder/ms-marco-MiniLM-L-6-v2"
-        )
-        reranker = CrossEncoderReranker(model=cross_encoder, top_n=top_n)
+        reranker = CrossEncoderReranker(model=_get_cross_encoder(), top_n=top_n)
 
         retriever = ContextualCompressionRetriever(
             base_compressor=reranker,
@@ -159,8 +211,14 @@ def add_documents(documents, chunk_size=512, chunk_overlap=50):
     """
     chunks = _semantic_split_documents(documents, chunk_size, chunk_overlap)
 
-    vector_store = get_vector_store()
-    vector_store.add_documents(chunks)
+    # Each call embeds its whole batch with one embed_documents() call and
+    # upserts it at once; batching keeps memory bounded and stays under
+    # Chroma's per-request size limit on large corpora
+    with _WRITE_LOCK:
+        vector_store = get_vector_store()
+        for start in range(0, len(chunks), EMBED_BATCH_SIZE):
+            vector_store.add_documents(chunks[start : start + EMBED_BATCH_SIZE])
+        _RETRIEVER_CACHE.clear()
 
     return len(chunks)
 
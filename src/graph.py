@@ -1,5 +1,7 @@
 """Main graph assembly — wires supervisor router with specialist agents."""
 
+import functools
+
 from langchain_core.messages import AIMessage
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import END, START, StateGraph
@@ -8,8 +10,13 @@ from src.agents.general_agent import create_general_agent_graph
 from src.agents.rag_agent import create_rag_agent_graph
 from src.agents.sql_agent import create_sql_agent_graph
 from src.agents.supervisor import create_router
-from src.config.settings import get_llm
+from src.config.settings import get_llm, get_sqlite_path, reload_env
 from src.state.schemas import CustomerSupportState
+from src.tools.sql_tools import clear_schema_cache
+
+# Shared by every graph built without an explicit checkpointer; conversations
+# are kept apart by their thread_id.
+_DEFAULT_CHECKPOINTER = InMemorySaver()
 
 
 def _make_agent_node(agent_graph):
@@ -62,12 +69,17 @@ def build_graph(llm=None, checkpointer=None):
     Args:
         llm: Optional LLM instance. Defaults to configured LLM.
         checkpointer: Optional checkpointer for conversation persistence.
+            Defaults to a module-level InMemorySaver.
 
     Returns:
         Compiled StateGraph.
     """
-    llm = llm or get_llm()
+    builder = _build_graph_builder(llm or get_llm())
+    return builder.compile(checkpointer=checkpointer or _DEFAULT_CHECKPOINTER)
 
+
+def _build_graph_builder(llm):
+    """Wire the router and specialist agents into an uncompiled StateGraph."""
     # Create specialist agent graphs
     sql_agent = create_sql_agent_graph(llm)
     rag_agent = create_rag_agent_graph(llm)
@@ -102,8 +114,43 @@ def build_graph(llm=None, checkpointer=None):
     builder.add_edge("rag_agent", END)
     builder.add_edge("general_agent", END)
 
-    # Compile with checkpointer
+    return builder
+
+
+@functools.lru_cache(maxsize=4)
+def _get_cached_builder(provider, model, temperature, db_path):
+    # db_path only keys the cache; the SQL agent reads it from the environment
+    return _build_graph_builder(
+        get_llm(provider=provider, model=model, temperature=temperature)
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _get_cached_graph(provider, model, temperature, db_path):
+    builder = _get_cached_builder(provider, model, temperature, db_path)
+    return builder.compile(checkpointer=_DEFAULT_CHECKPOINTER)
+
+
+def get_graph(provider=None, model=None, temperature=None, checkpointer=None):
+    """Return a compiled graph for the given LLM configuration.
+
+    Agents, tools and the DB schema are only created on the first call per
+    (provider, model, temperature, SQLite path). Without a checkpointer the
+    compiled graph itself is reused; with one, only compile() runs again.
+    """
+    key = (provider, model, temperature, get_sqlite_path())
     if checkpointer is None:
-        checkpointer = InMemorySaver()
+        return _get_cached_graph(*key)
+    return _get_cached_builder(*key).compile(checkpointer=checkpointer)
 
-    return builder.compile(checkpointer=checkpointer)
+
+def clear_caches():
+    """Forget cached graphs, LLM clients and DB schema, and re-read settings.
+
+    Call after changing the environment (e.g. saving new API keys to .env)
+    so the next get_graph() builds everything from the new settings.
+    """
+    _get_cached_graph.cache_clear()
+    _get_cached_builder.cache_clear()
+    clear_schema_cache()
+    reload_env()  # also clears the cached chat-model clients
@@ -2,6 +2,8 @@
 
 import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
 from mcp.server.fastmcp import FastMCP
@@ -10,10 +12,67 @@ mcp = FastMCP("CustomerSupport")
 
 DB_PATH = os.getenv("SQLITE_DB_PATH", "data/customer_support.db")
 
+# Rows formatted per tool reply; the rest are summarized in a tail line
+MAX_RESULTS = 50
+
+_tls = threading.local()
+
+# Databases seeded before the index was added to the seed schema lack it
+_TICKET_HISTORY_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_tickets_customer_created
+        ON tickets(customer_id, created_at DESC)
+"""
+
+
+def open_connection(db_path):
+    """Open a connection set up the way the tools expect.
+
+    Autocommit, WAL, rows indexable by column name, and the ticket history
+    index, created if missing.
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    try:
+        conn.execute(_TICKET_HISTORY_INDEX)
+    except sqlite3.OperationalError:
+        # No tickets table yet, or a read-only database; queries still work
+        pass
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+@contextmanager
+def use_connection(conn):
+    """Run this thread's tool calls against conn instead of DB_PATH."""
+    previous = getattr(_tls, "override", None)
+    _tls.override = conn
+    try:
+        yield conn
+    finally:
+        _tls.override = previous
+
 
 def _get_connection():
-    """Get a SQLite connection."""
-    return sqlite3.connect(DB_PATH)
+    """Get this thread's SQLite connection, opening it on first use.
+
+    The connection is kept open across tool calls and reopened if DB_PATH
+    changes; a connection installed with use_connection() takes precedence.
+    """
+    override = getattr(_tls, "override", None)
+    if override is not None:
+        return override
+
+    conn = getattr(_tls, "conn", None)
+    if conn is not None and _tls.path == DB_PATH:
+        return conn
+    if conn is not None:
+        conn.close()
+
+    conn = open_connection(DB_PATH)
+    _tls.conn, _tls.path = conn, DB_PATH
+    return conn
 
 
 @mcp.tool()
@@ -26,19 +85,19 @@ def lookup_customer(customer_name: str) -> str:
     conn = _get_connection()
     cursor = conn.cursor()
     cursor.execute(
-        "SELECT * FROM customers WHERE name LIKE ?",
-        (f"%{customer_name}%",),
+        """SELECT customer_id, name, email, phone, account_type,
+                  subscription_tier, account_status, join_date,
+                  COUNT(*) OVER () AS total
+           FROM customers WHERE name LIKE ? LIMIT ?""",
+        (f"%{customer_name}%", MAX_RESULTS),
     )
     rows = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    conn.close()
 
     if not rows:
         return f"No customer found matching '{customer_name}'"
 
     results = []
-    for row in rows:
-        customer = dict(zip(columns, row, strict=False))
+    for customer in rows:
         results.append(
             f"Customer ID: {customer['customer_id']}\n"
             f"Name: {customer['name']}\n"
@@ -50,6 +109,9 @@ def lookup_customer(customer_name: str) -> str:
             f"Join Date: {customer['join_date']}"
         )
 
+    more = rows[0]["total"] - len(rows)
+    if more:
+        results.append(f"...and {more} more matching customers")
     return "\n\n---\n\n".join(results)
 
 
@@ -63,19 +125,19 @@ def get_ticket_history(customer_id: int) -> str:
     conn = _get_connection()
     cursor = conn.cursor()
     cursor.execute(
-        "SELECT * FROM tickets WHERE customer_id = ? ORDER BY created_at DESC",
-        (customer_id,),
+        """SELECT ticket_id, subject, category, priority, status, channel,
+                  created_at, assigned_agent, COUNT(*) OVER () AS total
+           FROM tickets WHERE customer_id = ?
+           ORDER BY created_at DESC LIMIT ?""",
+        (customer_id, MAX_RESULTS),
     )
     rows = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    conn.close()
 
     if not rows:
         return f"No tickets found for customer ID {customer_id}"
 
     results = []
-    for row in rows:
-        ticket = dict(zip(columns, row, strict=False))
+    for ticket in rows:
         results.append(
             f"Ticket #{ticket['ticket_id']}: {ticket['subject']}\n"
             f"  Category: {ticket['category']} | Priority: {ticket['priority']}\n"
@@ -84,7 +146,10 @@ def get_ticket_history(customer_id: int) -> str:
             f"  Agent: {ticket['assigned_agent']}"
         )
 
-    return f"Found {len(rows)} tickets:\n\n" + "\n\n".join(results)
+    total = rows[0]["total"]
+    if total > len(rows):
+        results.append(f"...and {total - len(rows)} older tickets")
+    return f"Found {total} tickets:\n\n" + "\n\n".join(results)
 
 
 @mcp.tool()
@@ -107,34 +172,34 @@ def create_ticket(
     conn = _get_connection()
     cursor = conn.cursor()
 
-    # Verify customer exists
-    cursor.execute("SELECT name FROM customers WHERE customer_id = ?", (customer_id,))
-    customer = cursor.fetchone()
-    if not customer:
-        conn.close()
-        return f"Error: Customer ID {customer_id} not found"
-
+    # One statement: inserts nothing when the customer does not exist
     cursor.execute(
         """INSERT INTO tickets
            (customer_id, subject, description, category, priority,
             status, channel, assigned_agent, created_at)
-           VALUES (?, ?, ?, ?, ?, 'open', 'chat', 'AI Assistant', ?)""",
+           SELECT customer_id, ?, ?, ?, ?, 'open', 'chat', 'AI Assistant', ?
+           FROM customers WHERE customer_id = ?
+           RETURNING ticket_id,
+                     (SELECT name FROM customers
+                      WHERE customer_id = tickets.customer_id)""",
         (
-            customer_id,
             subject,
             description,
             category,
             priority,
             datetime.now().isoformat(),
+            customer_id,
         ),
     )
-    ticket_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    # Step the statement to completion so the insert is finished
+    created = cursor.fetchall()
+    if not created:
+        return f"Error: Customer ID {customer_id} not found"
+    ticket_id, customer_name = created[0]
 
     return (
         f"Ticket #{ticket_id} created successfully!\n"
-        f"  Customer: {customer[0]} (ID: {customer_id})\n"
+        f"  Customer: {customer_name} (ID: {customer_id})\n"
         f"  Subject: {subject}\n"
         f"  Priority: {priority}\n"
         f"  Category: {category}\n"
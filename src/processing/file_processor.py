@@ -3,10 +3,15 @@
 import csv
 import io
 import os
+import shutil
 import sqlite3
 import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing, contextmanager
+from itertools import islice
 
 from src.config.settings import get_sqlite_path
+from src.db.vector_store import add_pdf_files, add_text_files, get_document_count
 
 # Column definitions for each table.
 # required: columns that must be present in the CSV
@@ -60,26 +65,86 @@ TABLE_SCHEMAS = {
     },
 }
 
+# Lowercased column names, precomputed once for header matching.
+# data_cols_lc excludes the auto-ID column, which SQLite assigns on insert.
+for _schema in TABLE_SCHEMAS.values():
+    _schema["all_cols_lc"] = [c.lower() for c in _schema["all_cols"]]
+    _schema["data_cols_lc"] = [
+        c.lower() for c in _schema["all_cols"] if c != _schema["auto_id"]
+    ]
+del _schema
+
+# Statements built once per table, so sqlite3 reuses its cached prepared form
+_INSERT_SQL = {
+    table: (
+        f"INSERT INTO {table} ({', '.join(schema['data_cols_lc'])}) "  # noqa: S608
+        f"VALUES ({', '.join(['?'] * len(schema['data_cols_lc']))})"
+    )
+    for table, schema in TABLE_SCHEMAS.items()
+}
+_COUNT_SQL = {table: f"SELECT COUNT(*) FROM {table}" for table in TABLE_SCHEMAS}  # noqa: S608
+
+# One bit per known column, so header detection is integer mask arithmetic
+COL_BITS = {
+    col: 1 << i
+    for i, col in enumerate(
+        sorted({c for s in TABLE_SCHEMAS.values() for c in s["all_cols_lc"]})
+    )
+}
+REQUIRED_MASK = {
+    table: sum(COL_BITS[c.lower()] for c in schema["required"])
+    for table, schema in TABLE_SCHEMAS.items()
+}
+ALL_MASK = {
+    table: sum(COL_BITS[c] for c in schema["all_cols_lc"])
+    for table, schema in TABLE_SCHEMAS.items()
+}
+
+# Rows per executemany call when inserting CSV data into SQLite
+CSV_BATCH_SIZE = 10_000
+
+# Stop validating an upload once this many errors have been collected
+MAX_CSV_ERRORS = 5
+
+# Chunk size for copying uploaded documents to disk
+UPLOAD_COPY_CHUNK = 1 << 20
+
+# Upper bound on documents indexed concurrently
+MAX_UPLOAD_WORKERS = 4
+
+# Type checks for numeric columns: column -> (parser, description for errors)
+NUMERIC_COLUMNS = {
+    "products": {"price": (float, "numeric")},
+    "tickets": {"customer_id": (int, "integer")},
+}
+
+
+# Indexing function and display label per document extension
+DOCUMENT_HANDLERS = {
+    ".pdf": (add_pdf_files, "PDF"),
+    ".txt": (add_text_files, "TXT"),
+}
+
 
 def detect_csv_table(headers):
     """Auto-detect which table a CSV maps to based on its column headers.
 
     Returns the table name or None if no match.
     """
-    header_set = {h.strip().lower() for h in headers}
+    mask = 0
+    for h in headers:
+        mask |= COL_BITS.get(h.strip().lower(), 0)
 
     best_match = None
     best_score = 0
 
-    for table_name, schema in TABLE_SCHEMAS.items():
+    for table_name, required in REQUIRED_MASK.items():
         # Check if all required columns are present
-        required = {c.lower() for c in schema["required"]}
-        if not required.issubset(header_set):
+        if mask & required != required:
             continue
 
         # Score by how many of the table's columns match
-        all_cols = {c.lower() for c in schema["all_cols"]}
-        score = len(header_set & all_cols)
+        score = (mask & ALL_MASK[table_name]).bit_count()
         if score > best_score:
             best_score = score
             best_match = table_name
@@ -87,49 +152,97 @@ def detect_csv_table(headers):
     return best_match
 
 
+def _column_layout(headers, table_name):
+    """Map a table's columns to their positions in a CSV header row.
+
+    Columns missing from the CSV map to len(headers), the always-empty cell
+    that _normalize_record appends. Returns (data_pos, required, numeric),
+    with data_pos aligned to the table's _INSERT_SQL placeholders.
+    """
+    schema = TABLE_SCHEMAS[table_name]
+    width = len(headers)
+    position = {h.strip().lower(): i for i, h in enumerate(headers)}
+
+    data_pos = [position.get(c, width) for c in schema["data_cols_lc"]]
+    required = [(c, position.get(c.lower(), width)) for c in schema["required"]]
+    numeric = [
+        (c, position.get(c.lower(), width), parse, kind)
+        for c, (parse, kind) in NUMERIC_COLUMNS.get(table_name, {}).items()
+    ]
+    return data_pos, required, numeric
+
+
+def _normalize_record(record, width):
+    """Strip a positional CSV record and pad it with the trailing empty cell."""
+    values = [v.strip() for v in record[:width]]
+    values.extend([""] * (width + 1 - len(values)))
+    return values
+
+
+def _record_errors(i, values, required, numeric):
+    """Return the validation errors for one normalized record."""
+    errors = []
+    for col, pos in required:
+        if not values[pos]:
+            errors.append(f"Row {i}: missing required field '{col}'")
+    for col, pos, parse, kind in numeric:
+        val = values[pos]
+        if val:
+            try:
+                parse(val)
+            except ValueError:
+                errors.append(f"Row {i}: '{col}' must be {kind}, got '{val}'")
+    return errors
+
+
+def _dict_rows_to_records(rows):
+    """Convert DictReader-style rows to (headers, positional records).
+
+    Headers are the union of all rows' keys, in first-seen order, so a column
+    that only appears in later rows is kept. Missing or None cells become "",
+    matching what csv.reader yields.
+    """
+    rows = list(rows)
+    headers = list(dict.fromkeys(key for row in rows for key in row))
+    return headers, ([row.get(h) or "" for h in headers] for row in rows)
+
+
+def _insert_batches(cursor, sql, params):
+    """Run executemany over a params iterator in CSV_BATCH_SIZE chunks.
+
+    Returns the number of rows inserted.
+    """
+    inserted = 0
+    while batch := list(islice(params, CSV_BATCH_SIZE)):
+        cursor.executemany(sql, batch)
+        inserted += len(batch)
+    return inserted
+
+
+def _connect(db_path=None):
+    """Open a SQLite connection tuned for bulk CSV writes."""
+    conn = sqlite3.connect(db_path or get_sqlite_path())
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
 def validate_csv_data(rows, table_name):
     """Validate CSV rows against a table schema.
 
     Returns (is_valid, errors) tuple.
     """
-    schema = TABLE_SCHEMAS.get(table_name)
-    if not schema:
+    if table_name not in TABLE_SCHEMAS:
         return False, [f"Unknown table: {table_name}"]
 
+    headers, records = _dict_rows_to_records(rows)
+    _, required, numeric = _column_layout(headers, table_name)
+    width = len(headers)
+
     errors = []
-    required = schema["required"]
-
-    for i, row in enumerate(rows):
-        row_lower = {k.strip().lower(): v for k, v in row.items()}
-        for col in required:
-            val = row_lower.get(col.lower(), "").strip()
-            if not val:
-                errors.append(f"Row {i + 1}: missing required field '{col}'")
-
-    # Type validation for numeric fields
-    if table_name == "products":
-        for i, row in enumerate(rows):
-            row_lower = {k.strip().lower(): v for k, v in row.items()}
-            price = row_lower.get("price", "").strip()
-            if price:
-                try:
-                    float(price)
-                except ValueError:
-                    errors.append(
-                        f"Row {i + 1}: 'price' must be numeric, got '{price}'"
-                    )
-
-    if table_name == "tickets":
-        for i, row in enumerate(rows):
-            row_lower = {k.strip().lower(): v for k, v in row.items()}
-            cid = row_lower.get("customer_id", "").strip()
-            if cid:
-                try:
-                    int(cid)
-                except ValueError:
-                    errors.append(
-                        f"Row {i + 1}: 'customer_id' must be integer, got '{cid}'"
-                    )
+    for i, record in enumerate(records, start=1):
+        values = _normalize_record(record, width)
+        errors.extend(_record_errors(i, values, required, numeric))
 
     return len(errors) == 0, errors
 
@@ -139,66 +252,96 @@ def insert_csv_to_sqlite(rows, table_name, db_path=None):
 
     Returns the number of rows inserted.
     """
-    db_path = db_path or get_sqlite_path()
-    schema = TABLE_SCHEMAS[table_name]
-    auto_id = schema["auto_id"]
-    all_cols = schema["all_cols"]
+    headers, records = _dict_rows_to_records(rows)
+    data_pos, _, _ = _column_layout(headers, table_name)
+    width = len(headers)
 
-    conn = sqlite3.connect(db_path)
+    conn = _connect(db_path)
     cursor = conn.cursor()
 
-    # Get current max ID
-    cursor.execute(f"SELECT COALESCE(MAX({auto_id}), 0) FROM {table_name}")  # noqa: S608
-    next_id = cursor.fetchone()[0] + 1
-
-    inserted = 0
-    for row in rows:
-        # Normalize header keys to lowercase
-        row_lower = {k.strip().lower(): v.strip() for k, v in row.items()}
-
-        values = []
-        for col in all_cols:
-            if col == auto_id:
-                values.append(next_id)
-                next_id += 1
-            else:
-                values.append(row_lower.get(col.lower(), None) or None)
-
-        placeholders = ", ".join(["?"] * len(all_cols))
-        col_names = ", ".join(all_cols)
-        cursor.execute(
-            f"INSERT INTO {table_name} ({col_names}) VALUES ({placeholders})",  # noqa: S608
-            values,
-        )
-        inserted += 1
+    params = (
+        tuple(values[pos] or None for pos in data_pos)
+        for values in (_normalize_record(record, width) for record in records)
+    )
 
+    # Bounded batches, committed as a single transaction
+    inserted = _insert_batches(cursor, _INSERT_SQL[table_name], params)
     conn.commit()
     conn.close()
     return inserted
 
 
-def _get_table_count(table_name, db_path=None):
-    """Get current row count in a table."""
-    db_path = db_path or get_sqlite_path()
-    conn = sqlite3.connect(db_path)
+def _load_csv_records(records, headers, table_name, db_path=None, conn=None):
+    """Validate and insert positional CSV records in a single streaming pass.
+
+    Records are inserted in batches of CSV_BATCH_SIZE inside one transaction,
+    which is rolled back if any record fails validation. A connection passed
+    in via conn is left open for the caller.
+    Returns (inserted, errors) tuple.
+    """
+    data_pos, required, numeric = _column_layout(headers, table_name)
+    width = len(headers)
+    sql = _INSERT_SQL[table_name]
+
+    own_conn = conn is None
+    if own_conn:
+        conn = _connect(db_path)
     cursor = conn.cursor()
-    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")  # noqa: S608
-    count = cursor.fetchone()[0]
-    conn.close()
-    return count
+    try:
+        errors = []
+        batch = []
+        inserted = 0
+        # Blank lines come through csv.reader as empty records; skip them
+        # (as DictReader did) so they neither fail validation nor count
+        nonblank = (record for record in records if any(record))
+        for i, record in enumerate(nonblank, start=1):
+            values = _normalize_record(record, width)
+            errors.extend(_record_errors(i, values, required, numeric))
+            if errors:
+                if len(errors) >= MAX_CSV_ERRORS:
+                    break
+                continue
+
+            batch.append(tuple(values[pos] or None for pos in data_pos))
+            if len(batch) >= CSV_BATCH_SIZE:
+                cursor.executemany(sql, batch)
+                inserted += len(batch)
+                batch.clear()
+
+        if errors:
+            conn.rollback()
+            return 0, errors[:MAX_CSV_ERRORS]
+
+        cursor.executemany(sql, batch)
+        conn.commit()
+        return inserted + len(batch), []
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def _get_table_count(table_name, db_path=None, conn=None):
+    """Get current row count in a table, reusing conn when given."""
+    if conn is not None:
+        return conn.execute(_COUNT_SQL[table_name]).fetchone()[0]
+    with closing(sqlite3.connect(db_path or get_sqlite_path())) as conn:
+        return conn.execute(_COUNT_SQL[table_name]).fetchone()[0]
 
 
 def _process_csv(uploaded_file, st):
     """Process a CSV file: detect table, validate, insert into SQLite."""
     content = uploaded_file.getvalue().decode("utf-8")
-    reader = csv.DictReader(io.StringIO(content))
-    headers = reader.fieldnames or []
-    rows = list(reader)
-
-    with st.status(f"Processing **{uploaded_file.name}**...", expanded=True) as status:
+    reader = csv.reader(io.StringIO(content))
+    headers = next(reader, [])
+
+    # One connection serves the count, the streamed insert and the final tally
+    with (
+        closing(_connect()) as conn,
+        st.status(f"Processing **{uploaded_file.name}**...", expanded=True) as status,
+    ):
         st.write("Detecting file type... **CSV** (structured data)")
 
-        st.write(f"Found **{len(rows)}** rows with columns: `{', '.join(headers)}`")
+        st.write(f"Found columns: `{', '.join(headers)}`")
 
         table_name = detect_csv_table(headers)
         if not table_name:
@@ -208,23 +351,21 @@ def _process_csv(uploaded_file, st):
 
         st.write(f"Matched to table: **{table_name}**")
 
-        is_valid, errors = validate_csv_data(rows, table_name)
-        if not is_valid:
+        count_before = _get_table_count(table_name, conn=conn)
+        st.write(f"Current table count: **{count_before}**")
+
+        st.write("Validating and inserting records...")
+        inserted, errors = _load_csv_records(reader, headers, table_name, conn=conn)
+        if errors:
             status.update(
                 label=f"{uploaded_file.name} - Validation failed", state="error"
             )
-            for err in errors[:5]:
+            for err in errors:
                 st.error(err)
             return False
-        st.write("Validating data... **Passed**")
-
-        count_before = _get_table_count(table_name)
-        st.write(f"Current table count: **{count_before}**")
-
-        st.write(f"Inserting **{len(rows)}** records...")
-        inserted = insert_csv_to_sqlite(rows, table_name)
+        st.write(f"Validating data... **Passed** ({inserted} rows)")
 
-        count_after = _get_table_count(table_name)
+        count_after = count_before + inserted
         status.update(
             label=f"{uploaded_file.name} - Done! ({table_name}: {count_before} -> {count_after}, +{inserted})",
             state="complete",
@@ -232,78 +373,91 @@ def _process_csv(uploaded_file, st):
     return True
 
 
-def _process_pdf(uploaded_file, st):
-    """Process a PDF file: save to temp, chunk, index into ChromaDB."""
-    from src.db.vector_store import add_pdf_files, get_document_count
-
-    with st.status(f"Processing **{uploaded_file.name}**...", expanded=True) as status:
-        st.write("Detecting file type... **PDF** (unstructured document)")
+@contextmanager
+def _saved_upload(uploaded_file):
+    """Copy an uploaded file into a private temp directory and yield its path.
 
-        st.write("Saving file for processing...")
-        temp_path = os.path.join(tempfile.gettempdir(), uploaded_file.name)
+    The file keeps its original name so chunk sources stay readable, and the
+    directory is removed once the caller is done, even on error.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = os.path.join(temp_dir, os.path.basename(uploaded_file.name))
+        uploaded_file.seek(0)
         with open(temp_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-
-        st.write("Chunking and indexing into vector store...")
-        num_chunks = add_pdf_files([temp_path])
+            shutil.copyfileobj(uploaded_file, f, UPLOAD_COPY_CHUNK)
+        yield temp_path
 
-        # Cleanup
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
 
-        doc_count = get_document_count()
-        status.update(
-            label=f"{uploaded_file.name} - Done! Created {num_chunks} chunks (total: {doc_count})",
-            state="complete",
-        )
-    return True
+def _index_document(uploaded_file, add_files):
+    """Save an uploaded document to disk and index it; returns the chunk count.
 
+    Runs on upload worker threads, so it must not touch Streamlit.
+    """
+    with _saved_upload(uploaded_file) as temp_path:
+        return add_files([temp_path])
 
-def _process_txt(uploaded_file, st):
-    """Process a TXT file: save to temp, chunk, index into ChromaDB."""
-    from src.db.vector_store import add_text_files, get_document_count
 
-    with st.status(f"Processing **{uploaded_file.name}**...", expanded=True) as status:
-        st.write("Detecting file type... **TXT** (unstructured document)")
+def _process_documents(documents, st):
+    """Index PDF/TXT uploads on a thread pool.
 
-        st.write("Saving file for processing...")
-        temp_path = os.path.join(tempfile.gettempdir(), uploaded_file.name)
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+    Status containers are created and updated on the calling thread; only
+    the save/load/chunk work runs on the pool. Writes to the vector store
+    are serialized by add_documents. Returns (success_count, failure_count).
+    """
+    success = 0
+    failure = 0
 
-        st.write("Chunking and indexing into vector store...")
-        num_chunks = add_text_files([temp_path])
+    workers = min(MAX_UPLOAD_WORKERS, len(documents))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for uploaded_file, ext in documents:
+            add_files, kind = DOCUMENT_HANDLERS[ext]
+            status = st.status(f"Processing **{uploaded_file.name}**...", expanded=True)
+            status.write(f"Detecting file type... **{kind}** (unstructured document)")
+            status.write("Chunking and indexing into vector store...")
+            future = pool.submit(_index_document, uploaded_file, add_files)
+            futures[future] = (uploaded_file, status)
+
+        for future in as_completed(futures):
+            uploaded_file, status = futures[future]
+            try:
+                num_chunks = future.result()
+            except Exception as e:
+                status.update(label=f"{uploaded_file.name} - Failed", state="error")
+                st.error(f"Error processing {uploaded_file.name}: {e}")
+                failure += 1
+                continue
 
-        # Cleanup
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+            doc_count = get_document_count()
+            status.update(
+                label=f"{uploaded_file.name} - Done! Created {num_chunks} chunks (total: {doc_count})",
+                state="complete",
+            )
+            success += 1
 
-        doc_count = get_document_count()
-        status.update(
-            label=f"{uploaded_file.name} - Done! Created {num_chunks} chunks (total: {doc_count})",
-            state="complete",
-        )
-    return True
+    return success, failure
 
 
 def process_uploaded_files(uploaded_files, st):
     """Main entry point: process a list of uploaded files.
 
-    Routes each file to the appropriate handler based on extension.
+    Routes each file to the appropriate handler based on extension. CSVs are
+    inserted one at a time (SQLite has a single writer); PDF/TXT documents
+    are then indexed in parallel.
     Returns (success_count, failure_count).
     """
     success = 0
     failure = 0
+    documents = []
 
     for uploaded_file in uploaded_files:
         ext = os.path.splitext(uploaded_file.name)[1].lower()
+        if ext in DOCUMENT_HANDLERS:
+            documents.append((uploaded_file, ext))
+            continue
         try:
             if ext == ".csv":
                 ok = _process_csv(uploaded_file, st)
-            elif ext == ".pdf":
-                ok = _process_pdf(uploaded_file, st)
-            elif ext == ".txt":
-                ok = _process_txt(uploaded_file, st)
             else:
                 st.warning(f"Unsupported file type: {uploaded_file.name}")
                 failure += 1
@@ -317,4 +471,9 @@ def process_uploaded_files(uploaded_files, st):
             st.error(f"Error processing {uploaded_file.name}: {e}")
             failure += 1
 
+    if documents:
+        doc_success, doc_failure = _process_documents(documents, st)
+        success += doc_success
+        failure += doc_failure
+
     return success, failure
@@ -4,18 +4,19 @@ import sys
 
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
+# Server connection config for the customer support MCP server
+MCP_SERVERS = {
+    "customer_support": {
+        "command": sys.executable,
+        "args": ["src/mcp_servers/support_server.py"],
+        "transport": "stdio",
+    }
+}
+
 
 def get_mcp_client():
     """Get a MultiServerMCPClient configured for the customer support MCP server."""
-    return MultiServerMCPClient(
-        {
-            "customer_support": {
-                "command": sys.executable,
-                "args": ["src/mcp_servers/support_server.py"],
-                "transport": "stdio",
-            }
-        }
-    )
+    return MultiServerMCPClient(MCP_SERVERS)
 
 
 async def get_mcp_tools():
@@ -1,7 +1,10 @@
 """SQL database tools using SQLDatabaseToolkit."""
 
+from functools import lru_cache
+
 from langchain_community.agent_toolkits import SQLDatabaseToolkit
 
+from src.config.settings import get_sqlite_path
 from src.db.sql_database import get_sql_database
 
 
@@ -20,6 +23,22 @@ def get_sql_tools(llm, db=None):
 
 
 def get_db_schema(db=None):
-    """Return the full schema string for embedding in agent prompts."""
-    db = db or get_sql_database()
-    return db.get_table_info()
+    """Return the full schema string for embedding in agent prompts.
+
+    The configured database's schema is introspected once per path; pass db
+    to read a specific SQLDatabase directly.
+    """
+    if db is not None:
+        return db.get_table_info()
+    return _get_cached_schema(get_sqlite_path())
+
+
+@lru_cache(maxsize=4)
+def _get_cached_schema(db_path):
+    """Introspect the schema of the database at db_path (cached)."""
+    return get_sql_database(db_path).get_table_info()
+
+
+def clear_schema_cache():
+    """Forget cached schemas so the next get_db_schema() re-introspects."""
+    _get_cached_schema.cache_clear()
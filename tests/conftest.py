@@ -1,95 +1,276 @@
 """Shared test fixtures."""
 
-import os
+import shutil
 import sqlite3
-import tempfile
+from contextlib import closing
+from functools import cache
 
 import pytest
 
+SCHEMA_SQL = """
+    CREATE TABLE customers (
+        customer_id INTEGER PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        email VARCHAR(255) UNIQUE,
+        phone VARCHAR(20),
+        account_type VARCHAR(50),
+        subscription_tier VARCHAR(50),
+        join_date DATE,
+        address TEXT,
+        account_status VARCHAR(50)
+    );
+
+    CREATE TABLE products (
+        product_id INTEGER PRIMARY KEY,
+        name VARCHAR(255),
+        category VARCHAR(100),
+        price DECIMAL(10,2),
+        description TEXT
+    );
+
+    CREATE TABLE tickets (
+        ticket_id INTEGER PRIMARY KEY,
+        customer_id INTEGER REFERENCES customers(customer_id),
+        subject VARCHAR(255),
+        description TEXT,
+        category VARCHAR(100),
+        priority VARCHAR(50),
+        status VARCHAR(50),
+        channel VARCHAR(50),
+        assigned_agent VARCHAR(100),
+        created_at TIMESTAMP,
+        resolved_at TIMESTAMP,
+        resolution TEXT,
+        satisfaction_rating INTEGER
+    );
+"""
+
+# fmt: off
+CUSTOMER_ROWS = [
+    (1, "John Doe", "john@example.com", "555-0101", "personal", "premium", "2024-01-15", "123 Main St", "active"),
+    (2, "Jane Smith", "jane@example.com", "555-0102", "business", "enterprise", "2023-06-20", "456 Oak Ave", "active"),
+    (3, "Bob Wilson", "bob@example.com", "555-0103", "personal", "free", "2025-03-10", "789 Pine Rd", "inactive"),
+]
+
+PRODUCT_ROWS = [
+    (1, "CloudSync Pro", "cloud_storage", 29.99, "Enterprise cloud storage"),
+    (2, "SecureVault", "security", 49.99, "Cybersecurity suite"),
+]
+
+TICKET_ROWS = [
+    (1, 1, "Billing Issue", "Charged twice for subscription", "billing", "high", "open", "email", "Alice", "2025-01-10", None, None, None),
+    (2, 1, "Login Problem", "Cannot access dashboard", "technical", "medium", "resolved", "chat", "Bob", "2025-01-05", "2025-01-06", "Password reset", 5),
+    (3, 2, "Refund Request", "Want refund for last month", "billing", "low", "closed", "phone", "Carol", "2025-01-01", "2025-01-03", "Refund processed", 4),
+]
+# fmt: on
+
+
+@pytest.fixture(scope="session", autouse=True)
+def deterministic_seed():
+    """Seed random and Faker once before any test runs.
+
+    generate_data seeds at import time, so without this the generated data
+    would depend on when that module first got imported.
+    """
+    import random
+
+    from faker import Faker
+
+    random.seed(42)
+    Faker.seed(42)
+
 
 @pytest.fixture
-def fake_llm():
-    """Create a FakeListChatModel for testing without API keys."""
+def patched_env(monkeypatch):
+    """monkeypatch for environment variables that also resets cached settings.
+
+    Call reload_env() after patching; the original environment is restored
+    and re-read when the test ends.
+    """
+    from src.config.settings import reload_env
+
+    yield monkeypatch
+    monkeypatch.undo()
+    reload_env()
+
+
+@cache
+def make_fake_llm(*responses):
+    """Return the shared FakeListChatModel for a given response sequence.
+
+    Instances are cached per responses tuple; callers must not mutate their
+    responses.
+    """
     from langchain_community.chat_models import FakeListChatModel
 
-    return FakeListChatModel(responses=["This is a test response from the fake LLM."])
+    return FakeListChatModel(responses=list(responses))
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def fake_llm():
+    """Create a FakeListChatModel for testing without API keys."""
+    return make_fake_llm("This is a test response from the fake LLM.")
+
+
+@pytest.fixture(scope="session")
 def fake_llm_with_routing():
     """Create a fake LLM that returns structured routing responses."""
-    from langchain_community.chat_models import FakeListChatModel
+    return make_fake_llm('{"datasource": "sql_agent"}')
+
+
+@pytest.fixture(scope="session")
+def customers_10():
+    """Ten generated customers, shared read-only across the session."""
+    from data.seed.generate_data import generate_customers
+
+    return tuple(generate_customers(10))
+
+
+@pytest.fixture(scope="session")
+def customers_50():
+    """Fifty generated customers, shared read-only across the session."""
+    from data.seed.generate_data import generate_customers
+
+    return tuple(generate_customers(50))
+
+
+@pytest.fixture(scope="session")
+def products_all():
+    """The full generated product catalog, shared read-only."""
+    from data.seed.generate_data import generate_products
+
+    return tuple(generate_products())
+
 
-    return FakeListChatModel(responses=['{"datasource": "sql_agent"}'])
+@pytest.fixture(scope="session")
+def tickets_500(customers_10, products_all):
+    """500 tickets for customers_10, shared read-only across the session."""
+    from data.seed.generate_data import generate_tickets
+
+    return tuple(generate_tickets(list(customers_10), list(products_all), 500))
+
+
+@pytest.fixture(scope="session")
+def tickets_100(tickets_500):
+    """The first 100 of tickets_500; tickets are generated independently."""
+    return tickets_500[:100]
+
+
+@pytest.fixture(scope="session")
+def generated_db_template(tmp_path_factory):
+    """Run the real seed_database once per session into a template file."""
+    from data.seed.seed_database import seed_database
+
+    path = tmp_path_factory.mktemp("seed") / "template.db"
+    seed_database(str(path))
+    return path
+
+
+@pytest.fixture
+def generated_db(generated_db_template, tmp_path):
+    """A per-test copy of the fully seeded database; returns its path."""
+    path = tmp_path / "seeded.db"
+    shutil.copy(generated_db_template, path)
+    return str(path)
 
 
 @pytest.fixture
-def temp_sqlite_db():
-    """Create a temporary SQLite database with test data."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
-        db_path = f.name
+def generated_db_conn(generated_db):
+    """An open connection to a per-test copy of the fully seeded database."""
+    with closing(sqlite3.connect(generated_db)) as conn:
+        yield conn
+
+
+@pytest.fixture(scope="session")
+def seeded_db_template():
+    """Build the test schema and seed rows once per session, in memory."""
+    conn = sqlite3.connect(":memory:")
+    with conn:
+        conn.executescript(SCHEMA_SQL)
+        conn.executemany(
+            "INSERT INTO customers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", CUSTOMER_ROWS
+        )
+        conn.executemany("INSERT INTO products VALUES (?, ?, ?, ?, ?)", PRODUCT_ROWS)
+        conn.executemany(
+            "INSERT INTO tickets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            TICKET_ROWS,
+        )
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def temp_sqlite_db(seeded_db_template, tmp_path):
+    """Create a temporary SQLite database with test data.
+
+    Each test gets its own file, copied page-for-page from the session
+    template, so tests that write (e.g. create_ticket) stay isolated.
+    """
+    db_path = str(tmp_path / "test.db")
 
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    cursor.executescript("""
-        CREATE TABLE customers (
-            customer_id INTEGER PRIMARY KEY,
-            name VARCHAR(255) NOT NULL,
-            email VARCHAR(255) UNIQUE,
-            phone VARCHAR(20),
-            account_type VARCHAR(50),
-            subscription_tier VARCHAR(50),
-            join_date DATE,
-            address TEXT,
-            account_status VARCHAR(50)
-        );
-
-        CREATE TABLE products (
-            product_id INTEGER PRIMARY KEY,
-            name VARCHAR(255),
-            category VARCHAR(100),
-            price DECIMAL(10,2),
-            description TEXT
-        );
-
-        CREATE TABLE tickets (
-            ticket_id INTEGER PRIMARY KEY,
-            customer_id INTEGER REFERENCES customers(customer_id),
-            subject VARCHAR(255),
-            description TEXT,
-            category VARCHAR(100),
-            priority VARCHAR(50),
-            status VARCHAR(50),
-            channel VARCHAR(50),
-            assigned_agent VARCHAR(100),
-            created_at TIMESTAMP,
-            resolved_at TIMESTAMP,
-            resolution TEXT,
-            satisfaction_rating INTEGER
-        );
-
-        INSERT INTO customers VALUES
-            (1, 'John Doe', 'john@example.com', '555-0101', 'personal', 'premium', '2024-01-15', '123 Main St', 'active'),
-            (2, 'Jane Smith', 'jane@example.com', '555-0102', 'business', 'enterprise', '2023-06-20', '456 Oak Ave', 'active'),
-            (3, 'Bob Wilson', 'bob@example.com', '555-0103', 'personal', 'free', '2025-03-10', '789 Pine Rd', 'inactive');
-
-        INSERT INTO products VALUES
-            (1, 'CloudSync Pro', 'cloud_storage', 29.99, 'Enterprise cloud storage'),
-            (2, 'SecureVault', 'security', 49.99, 'Cybersecurity suite');
-
-        INSERT INTO tickets VALUES
-            (1, 1, 'Billing Issue', 'Charged twice for subscription', 'billing', 'high', 'open', 'email', 'Alice', '2025-01-10', NULL, NULL, NULL),
-            (2, 1, 'Login Problem', 'Cannot access dashboard', 'technical', 'medium', 'resolved', 'chat', 'Bob', '2025-01-05', '2025-01-06', 'Password reset', 5),
-            (3, 2, 'Refund Request', 'Want refund for last month', 'billing', 'low', 'closed', 'phone', 'Carol', '2025-01-01', '2025-01-03', 'Refund processed', 4);
-    """)
-
-    conn.commit()
+    # Throwaway data: skip the rollback journal and fsyncs while copying
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    seeded_db_template.backup(conn)
     conn.close()
 
-    yield db_path
+    return db_path
+
+
+@pytest.fixture
+def db_conn(temp_sqlite_db):
+    """An open connection to temp_sqlite_db, closed after the test."""
+    with closing(sqlite3.connect(temp_sqlite_db)) as conn:
+        yield conn
+
+
+@pytest.fixture(scope="session")
+def shared_sqlite_db(seeded_db_template):
+    """A seeded in-memory database shared by tests that only read from it.
+
+    Returns a SQLAlchemy URL. The named shared-cache database lives as long
+    as this fixture holds a connection open.
+    """
+    uri = "file:readonly_test_db?mode=memory&cache=shared"
+    with closing(sqlite3.connect(uri, uri=True)) as keeper:
+        seeded_db_template.backup(keeper)
+        yield f"sqlite:///{uri}&uri=true"
+
+
+@pytest.fixture(scope="session")
+def sql_db(shared_sqlite_db):
+    """A SQLDatabase over shared_sqlite_db, reflected once per session."""
+    from langchain_community.utilities import SQLDatabase
+    from sqlalchemy.pool import QueuePool
+
+    return SQLDatabase.from_uri(shared_sqlite_db, engine_args={"poolclass": QueuePool})
+
+
+@pytest.fixture(scope="session")
+def sql_tools(fake_llm, sql_db):
+    """The SQL agent's tools bound to sql_db."""
+    from src.tools.sql_tools import get_sql_tools
+
+    return get_sql_tools(fake_llm, db=sql_db)
+
+
+@pytest.fixture(scope="session")
+def sql_query_tool(sql_tools):
+    """The sql_db_query tool from sql_tools."""
+    return next(t for t in sql_tools if t.name == "sql_db_query")
+
+
+@pytest.fixture(scope="session")
+def mocked_graph():
+    """The supervisor graph compiled once, with the agent subgraphs mocked."""
+    from unittest.mock import MagicMock, patch
+
+    with (
+        patch("src.graph.create_sql_agent_graph", return_value=MagicMock()),
+        patch("src.graph.create_rag_agent_graph", return_value=MagicMock()),
+        patch("src.graph.create_general_agent_graph", return_value=MagicMock()),
+    ):
+        from src.graph import build_graph
 
-    try:
-        os.unlink(db_path)
-    except PermissionError:
-        pass  # Windows may hold SQLite file locks
+        return build_graph(llm=MagicMock())
@@ -1,31 +1,24 @@
 """Tests for configuration module."""
 
-import os
+from unittest.mock import patch
 
 
 class TestSettings:
     """Test settings and configuration."""
 
-    def test_get_sqlite_path_default(self):
-        from src.config.settings import get_sqlite_path
+    def test_get_sqlite_path_default(self, patched_env):
+        from src.config.settings import get_sqlite_path, reload_env
 
-        # Remove env var to test default
-        old = os.environ.pop("SQLITE_DB_PATH", None)
-        try:
-            path = get_sqlite_path()
-            assert path == "data/customer_support.db"
-        finally:
-            if old is not None:
-                os.environ["SQLITE_DB_PATH"] = old
+        patched_env.delenv("SQLITE_DB_PATH", raising=False)
+        reload_env()
+        assert get_sqlite_path() == "data/customer_support.db"
 
-    def test_get_sqlite_path_custom(self):
-        from src.config.settings import get_sqlite_path
+    def test_get_sqlite_path_custom(self, patched_env):
+        from src.config.settings import get_sqlite_path, reload_env
 
-        os.environ["SQLITE_DB_PATH"] = "custom/path.db"
-        try:
-            assert get_sqlite_path() == "custom/path.db"
-        finally:
-            os.environ["SQLITE_DB_PATH"] = "data/customer_support.db"
+        patched_env.setenv("SQLITE_DB_PATH", "custom/path.db")
+        reload_env()
+        assert get_sqlite_path() == "custom/path.db"
 
     def test_get_chroma_settings_default(self):
         from src.config.settings import get_chroma_settings
@@ -42,3 +35,28 @@ class TestSettings:
         assert "anthropic" in DEFAULT_MODELS
         assert "openai" in DEFAULT_MODELS
         assert "google" in DEFAULT_MODELS
+
+    def test_get_llm_reuses_instance_per_config(self):
+        from src.config.settings import _init_cached_llm, get_llm
+
+        _init_cached_llm.cache_clear()
+        with patch("langchain.chat_models.init_chat_model") as mock_init:
+            mock_init.side_effect = lambda *a, **kw: object()
+            first = get_llm("openai", "gpt-4o", 0.0)
+            assert get_llm("openai", "gpt-4o", 0.0) is first
+            assert get_llm("openai", "gpt-4o", 0.5) is not first
+            assert get_llm("openai", "gpt-4o", 0.0, max_tokens=10) is not first
+            assert mock_init.call_count == 3
+        _init_cached_llm.cache_clear()
+
+    def test_reload_env_drops_cached_llm_clients(self, patched_env):
+        from src.config.settings import _init_cached_llm, get_llm, reload_env
+
+        _init_cached_llm.cache_clear()
+        with patch("langchain.chat_models.init_chat_model") as mock_init:
+            mock_init.side_effect = lambda *a, **kw: object()
+            first = get_llm("openai", "gpt-4o", 0.0)
+            patched_env.setenv("OPENAI_API_KEY", "new-key")
+            reload_env()
+            assert get_llm("openai", "gpt-4o", 0.0) is not first
+        _init_cached_llm.cache_clear()
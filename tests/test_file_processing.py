@@ -1,12 +1,18 @@
 """Unit tests for the file processing pipeline (no LLM/API calls needed)."""
 
-import os
+import csv
+import io
+import shutil
 import sqlite3
-import tempfile
+import threading
+import time
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from src.processing.file_processor import (
+    _load_csv_records,
+    _process_documents,
     detect_csv_table,
     insert_csv_to_sqlite,
     validate_csv_data,
@@ -109,60 +115,75 @@ class TestValidateCsvData:
         assert "Unknown table" in errors[0]
 
 
+@pytest.fixture(scope="session")
+def csv_schema_template(tmp_path_factory):
+    """An empty database with the three tables, built once per session."""
+    path = tmp_path_factory.mktemp("csv") / "schema.db"
+
+    # Throwaway DB: no fsyncs, and all DDL in one explicit transaction
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=MEMORY")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executescript("""
+        BEGIN;
+        CREATE TABLE customers (
+            customer_id INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255),
+            phone VARCHAR(20),
+            account_type VARCHAR(50),
+            subscription_tier VARCHAR(50),
+            join_date DATE,
+            address TEXT,
+            account_status VARCHAR(50)
+        );
+        CREATE TABLE products (
+            product_id INTEGER PRIMARY KEY,
+            name VARCHAR(255),
+            category VARCHAR(100),
+            price DECIMAL(10,2),
+            description TEXT
+        );
+        CREATE TABLE tickets (
+            ticket_id INTEGER PRIMARY KEY,
+            customer_id INTEGER,
+            subject VARCHAR(255),
+            description TEXT,
+            category VARCHAR(100),
+            priority VARCHAR(50),
+            status VARCHAR(50),
+            channel VARCHAR(50),
+            assigned_agent VARCHAR(100),
+            created_at TIMESTAMP,
+            resolved_at TIMESTAMP,
+            resolution TEXT,
+            satisfaction_rating INTEGER
+        );
+        COMMIT;
+    """)
+    conn.close()
+
+    return path
+
+
 class TestInsertCsvToSqlite:
     """Tests for CSV insertion into SQLite with auto-ID."""
 
     @pytest.fixture()
-    def temp_db(self):
-        """Create a temporary SQLite database with the schema."""
-        fd, path = tempfile.mkstemp(suffix=".db")
-        os.close(fd)
-
-        conn = sqlite3.connect(path)
-        cursor = conn.cursor()
-        cursor.executescript("""
-            CREATE TABLE customers (
-                customer_id INTEGER PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                email VARCHAR(255),
-                phone VARCHAR(20),
-                account_type VARCHAR(50),
-                subscription_tier VARCHAR(50),
-                join_date DATE,
-                address TEXT,
-                account_status VARCHAR(50)
-            );
-            CREATE TABLE products (
-                product_id INTEGER PRIMARY KEY,
-                name VARCHAR(255),
-                category VARCHAR(100),
-                price DECIMAL(10,2),
-                description TEXT
-            );
-            CREATE TABLE tickets (
-                ticket_id INTEGER PRIMARY KEY,
-                customer_id INTEGER,
-                subject VARCHAR(255),
-                description TEXT,
-                category VARCHAR(100),
-                priority VARCHAR(50),
-                status VARCHAR(50),
-                channel VARCHAR(50),
-                assigned_agent VARCHAR(100),
-                created_at TIMESTAMP,
-                resolved_at TIMESTAMP,
-                resolution TEXT,
-                satisfaction_rating INTEGER
-            );
-        """)
-        conn.commit()
-        conn.close()
+    def temp_db(self, csv_schema_template, tmp_path):
+        """A per-test copy of the empty schema database."""
+        path = str(tmp_path / "insert.db")
+        shutil.copy(csv_schema_template, path)
+        return path
 
-        yield path
-
-        os.unlink(path)
+    @pytest.fixture()
+    def conn(self, temp_db):
+        """An open connection to temp_db for checking what was inserted."""
+        conn = sqlite3.connect(temp_db)
+        yield conn
+        conn.close()
 
-    def test_insert_customers(self, temp_db):
+    def test_insert_customers(self, temp_db, conn):
         rows = [
             {"name": "Alice", "email": "alice@example.com", "phone": "555-0001"},
             {"name": "Bob", "email": "bob@example.com", "phone": "555-0002"},
@@ -170,38 +191,32 @@ class TestInsertCsvToSqlite:
         inserted = insert_csv_to_sqlite(rows, "customers", db_path=temp_db)
         assert inserted == 2
 
-        conn = sqlite3.connect(temp_db)
-        cursor = conn.cursor()
-        cursor.execute("SELECT customer_id, name FROM customers ORDER BY customer_id")
-        results = cursor.fetchall()
-        conn.close()
+        results = conn.execute(
+            "SELECT customer_id, name FROM customers ORDER BY customer_id"
+        ).fetchall()
 
         assert len(results) == 2
         assert results[0] == (1, "Alice")
         assert results[1] == (2, "Bob")
 
-    def test_auto_id_continues(self, temp_db):
+    def test_auto_id_continues(self, temp_db, conn):
         """IDs should continue from existing max."""
         # Pre-insert a row
-        conn = sqlite3.connect(temp_db)
-        conn.execute(
-            "INSERT INTO customers (customer_id, name, email) VALUES (100, 'Pre', 'pre@x.com')"
-        )
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute(
+                "INSERT INTO customers (customer_id, name, email) VALUES (100, 'Pre', 'pre@x.com')"
+            )
 
         rows = [{"name": "New", "email": "new@x.com"}]
         insert_csv_to_sqlite(rows, "customers", db_path=temp_db)
 
-        conn = sqlite3.connect(temp_db)
-        cursor = conn.cursor()
-        cursor.execute("SELECT customer_id FROM customers WHERE name = 'New'")
-        new_id = cursor.fetchone()[0]
-        conn.close()
+        (new_id,) = conn.execute(
+            "SELECT customer_id FROM customers WHERE name = 'New'"
+        ).fetchone()
 
         assert new_id == 101
 
-    def test_insert_products(self, temp_db):
+    def test_insert_products(self, temp_db, conn):
         rows = [
             {
                 "name": "Widget",
@@ -213,27 +228,110 @@ class TestInsertCsvToSqlite:
         inserted = insert_csv_to_sqlite(rows, "products", db_path=temp_db)
         assert inserted == 1
 
-        conn = sqlite3.connect(temp_db)
-        cursor = conn.cursor()
-        cursor.execute("SELECT product_id, name, price FROM products")
-        result = cursor.fetchone()
-        conn.close()
+        result = conn.execute("SELECT product_id, name, price FROM products").fetchone()
 
         assert result[0] == 1
         assert result[1] == "Widget"
 
-    def test_insert_with_missing_optional_fields(self, temp_db):
+    def test_insert_with_missing_optional_fields(self, temp_db, conn):
         """Missing optional fields should become NULL."""
         rows = [{"name": "Minimal", "email": "min@x.com"}]
         insert_csv_to_sqlite(rows, "customers", db_path=temp_db)
 
-        conn = sqlite3.connect(temp_db)
-        cursor = conn.cursor()
-        cursor.execute(
+        result = conn.execute(
             "SELECT phone, account_type FROM customers WHERE name = 'Minimal'"
-        )
-        result = cursor.fetchone()
-        conn.close()
+        ).fetchone()
+
+        assert result == (None, None)
+
+    def test_insert_keeps_columns_missing_from_first_row(self, temp_db, conn):
+        """A column that only appears in later rows is still inserted."""
+        rows = [
+            {"name": "First", "email": "first@x.com"},
+            {"name": "Second", "email": "second@x.com", "phone": "555-0100"},
+        ]
+        insert_csv_to_sqlite(rows, "customers", db_path=temp_db)
 
-        assert result[0] is None
-        assert result[1] is None
+        results = conn.execute(
+            "SELECT name, phone FROM customers ORDER BY customer_id"
+        ).fetchall()
+
+        assert results == [("First", None), ("Second", "555-0100")]
+
+    def test_load_csv_records_streams_positional_rows(self, temp_db, conn):
+        """Header case/whitespace is ignored and missing columns become NULL."""
+        headers = [" Email", "NAME", "extra"]
+        records = iter([["a@x.com", " Alice ", "x"], ["b@x.com", "Bob"]])
+        inserted, errors = _load_csv_records(records, headers, "customers", temp_db)
+        assert (inserted, errors) == (2, [])
+
+        results = conn.execute(
+            "SELECT customer_id, name, email, phone FROM customers"
+        ).fetchall()
+
+        assert results == [(1, "Alice", "a@x.com", None), (2, "Bob", "b@x.com", None)]
+
+    def test_load_csv_records_skips_blank_lines(self, temp_db, conn):
+        """Blank lines mid-file and at the end are ignored, not rejected."""
+        reader = csv.reader(io.StringIO("name,email\nAlice,a@x.com\n\nBob,b@x.com\n\n"))
+        headers = next(reader)
+        inserted, errors = _load_csv_records(reader, headers, "customers", temp_db)
+        assert (inserted, errors) == (2, [])
+
+        names = conn.execute("SELECT name FROM customers ORDER BY customer_id")
+        assert names.fetchall() == [("Alice",), ("Bob",)]
+
+    def test_load_csv_records_rolls_back_on_invalid_row(self, temp_db, conn):
+        headers = ["name", "category", "price"]
+        records = [["Widget", "tools", "9.99"], ["Gadget", "tools", "cheap"]]
+        inserted, errors = _load_csv_records(records, headers, "products", temp_db)
+        assert inserted == 0
+        assert errors == ["Row 2: 'price' must be numeric, got 'cheap'"]
+
+        assert conn.execute("SELECT COUNT(*) FROM products").fetchone() == (0,)
+
+
+class TestProcessDocuments:
+    """Tests for indexing PDF/TXT uploads."""
+
+    def test_indexes_two_files_at_once(self):
+        """Concurrent uploads are all indexed, with one vector store write at a time."""
+        from src.db import vector_store
+
+        active = 0
+        overlapped = False
+        written = []
+        guard = threading.Lock()
+
+        def add_chunks(chunks):
+            nonlocal active, overlapped
+            with guard:
+                active += 1
+                overlapped |= active > 1
+            time.sleep(0.05)
+            written.extend(chunk.page_content for chunk in chunks)
+            with guard:
+                active -= 1
+
+        store = MagicMock()
+        store.add_documents.side_effect = add_chunks
+        uploads = []
+        for name in ("a.txt", "b.txt"):
+            upload = io.BytesIO(f"contents of {name}".encode())
+            upload.name = name
+            uploads.append((upload, ".txt"))
+
+        with (
+            patch.object(
+                vector_store,
+                "_semantic_split_documents",
+                side_effect=lambda docs, *_: docs,
+            ),
+            patch.object(vector_store, "get_vector_store", return_value=store),
+            patch("src.processing.file_processor.get_document_count", return_value=2),
+        ):
+            success, failure = _process_documents(uploads, MagicMock())
+
+        assert (success, failure) == (2, 0)
+        assert sorted(written) == ["contents of a.txt", "contents of b.txt"]
+        assert not overlapped
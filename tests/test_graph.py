@@ -1,5 +1,6 @@
 """Tests for the main graph assembly."""
 
+from data.seed.generate_data import generate_tickets
 from src.state.schemas import CustomerSupportState
 
 
@@ -32,46 +33,27 @@ class TestGraphConstruction:
 class TestDataGeneration:
     """Test the synthetic data generation."""
 
-    def test_generate_customers(self):
-        from data.seed.generate_data import generate_customers
-
-        customers = generate_customers(10)
-        assert len(customers) == 10
-        assert all("name" in c for c in customers)
-        assert all("email" in c for c in customers)
-        assert all("customer_id" in c for c in customers)
-
-    def test_generate_products(self):
-        from data.seed.generate_data import generate_products
-
-        products = generate_products()
-        assert len(products) == 15
-        assert all("name" in p for p in products)
-        assert all("price" in p for p in products)
-
-    def test_generate_tickets(self):
-        from data.seed.generate_data import (
-            generate_customers,
-            generate_products,
-            generate_tickets,
-        )
-
-        customers = generate_customers(10)
-        products = generate_products()
-        tickets = generate_tickets(customers, products, 50)
+    def test_generate_customers(self, customers_10):
+        assert len(customers_10) == 10
+        assert all("name" in c for c in customers_10)
+        assert all("email" in c for c in customers_10)
+        assert all("customer_id" in c for c in customers_10)
+
+    def test_generate_products(self, products_all):
+        assert len(products_all) == 15
+        assert all("name" in p for p in products_all)
+        assert all("price" in p for p in products_all)
+
+    def test_generate_tickets(self, customers_10, products_all):
+        tickets = generate_tickets(list(customers_10), list(products_all), 50)
         assert len(tickets) == 50
         assert all("ticket_id" in t for t in tickets)
         assert all("category" in t for t in tickets)
 
-    def test_seed_database(self, temp_sqlite_db):
+    def test_seed_database(self, db_conn):
         """Test that the seed database creates proper tables."""
-        import sqlite3
-
-        conn = sqlite3.connect(temp_sqlite_db)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = {row[0] for row in cursor.fetchall()}
-        conn.close()
+        rows = db_conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = {name for (name,) in rows}
 
         assert "customers" in tables
         assert "products" in tables
@@ -1,20 +1,29 @@
 """Tests for MCP server tools."""
 
+from contextlib import closing
+from datetime import datetime
+
 import pytest
 
+# Share one worker (and its seeded template DB) under --dist=loadgroup
+pytestmark = pytest.mark.xdist_group("sqlite_db")
+
 
 class TestMCPServerTools:
     """Test MCP server tool functions directly."""
 
     @pytest.fixture(autouse=True)
-    def setup_db(self, temp_sqlite_db):
-        """Set up the database path for MCP server tests."""
-        import src.mcp_servers.support_server as server
+    def mcp_conn(self, temp_sqlite_db):
+        """Route the tools through one connection to the test database."""
+        from src.mcp_servers.support_server import open_connection, use_connection
+
+        with closing(open_connection(temp_sqlite_db)) as conn, use_connection(conn):
+            yield conn
 
-        self._orig_db = server.DB_PATH
-        server.DB_PATH = temp_sqlite_db
-        yield
-        server.DB_PATH = self._orig_db
+    def test_open_connection_adds_ticket_history_index(self, mcp_conn):
+        """Databases seeded without the index get it when the server connects."""
+        names = [row["name"] for row in mcp_conn.execute("PRAGMA index_list(tickets)")]
+        assert "idx_tickets_customer_created" in names
 
     def test_lookup_customer_found(self):
         from src.mcp_servers.support_server import lookup_customer
@@ -48,7 +57,16 @@ class TestMCPServerTools:
         result = get_ticket_history(999)
         assert "No tickets found" in result
 
-    def test_create_ticket_success(self):
+    def test_get_ticket_history_truncates_to_max_results(self, monkeypatch):
+        import src.mcp_servers.support_server as server
+
+        monkeypatch.setattr(server, "MAX_RESULTS", 1)
+        result = server.get_ticket_history(1)
+        assert result.startswith("Found 2 tickets:")
+        assert result.count("Ticket #") == 1
+        assert result.endswith("...and 1 older tickets")
+
+    def test_create_ticket_success(self, mcp_conn):
         from src.mcp_servers.support_server import create_ticket
 
         result = create_ticket(
@@ -60,6 +78,13 @@ class TestMCPServerTools:
         )
         assert "created successfully" in result
         assert "Test Ticket" in result
+        assert "Customer: John Doe (ID: 1)" in result
+
+        # created_at keeps the datetime.isoformat() format of existing rows
+        (created_at,) = mcp_conn.execute(
+            "SELECT created_at FROM tickets ORDER BY ticket_id DESC LIMIT 1"
+        ).fetchone()
+        assert datetime.fromisoformat(created_at).isoformat() == created_at
 
     def test_create_ticket_invalid_customer(self):
         from src.mcp_servers.support_server import create_ticket
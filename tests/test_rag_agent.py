@@ -1,7 +1,6 @@
 """Tests for RAG agent and retrieval tools."""
 
-import os
-import tempfile
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -17,14 +16,36 @@ class TestVectorStore:
         assert "collection_name" in settings
 
     @pytest.mark.integration
-    def test_vector_store_creation(self):
+    def test_vector_store_creation(self, patched_env, tmp_path):
         """Test that vector store can be created (requires embedding model)."""
+        from src.config.settings import reload_env
         from src.db.vector_store import get_vector_store
 
-        os.environ["CHROMA_PERSIST_DIR"] = tempfile.mkdtemp()
+        patched_env.setenv("CHROMA_PERSIST_DIR", str(tmp_path))
+        reload_env()
         store = get_vector_store()
         assert store is not None
 
+    def test_get_retriever_reuses_pipeline_until_collection_changes(self):
+        from src.db import vector_store
+
+        store = MagicMock()
+        store._collection.count.return_value = 10
+        vector_store._RETRIEVER_CACHE.clear()
+        with (
+            patch.object(vector_store, "get_vector_store", return_value=store),
+            patch.object(vector_store, "_build_retriever") as mock_build,
+        ):
+            mock_build.side_effect = lambda *a: MagicMock()
+            first = vector_store.get_retriever()
+            assert vector_store.get_retriever() is first
+            assert mock_build.call_count == 1
+
+            store._collection.count.return_value = 11
+            assert vector_store.get_retriever() is not first
+            assert mock_build.call_count == 2
+        vector_store._RETRIEVER_CACHE.clear()
+
 
 class TestRAGPrompt:
     """Test RAG agent prompt configuration."""
@@ -9,39 +9,30 @@ Run modes:
 """
 
 import argparse
-import math
+import functools
+import hashlib
+import os
+import sqlite3
+import warnings
+from contextlib import closing
+from math import isnan, nan
+from pathlib import Path
+from statistics import fmean
 
 import pytest
 
-ragas = pytest.importorskip("ragas", reason="ragas package not installed")
-
-import warnings  # noqa: E402
-
-from ragas import EvaluationDataset, SingleTurnSample, evaluate  # noqa: E402
-from ragas.embeddings import LangchainEmbeddingsWrapper  # noqa: E402
-from ragas.llms import LangchainLLMWrapper  # noqa: E402
-
-# Use legacy ragas.metrics (still functional) because ragas.metrics.collections
-# requires InstructorLLM and is incompatible with LangchainLLMWrapper.
-with warnings.catch_warnings():
-    warnings.simplefilter("ignore", DeprecationWarning)
-    from ragas.metrics import (  # noqa: E402
-        FactualCorrectness,
-        Faithfulness,
-        LLMContextPrecisionWithReference,
-        LLMContextRecall,
-        ResponseRelevancy,
-        SemanticSimilarity,
-    )
+from src.config.settings import get_embedding_model, get_llm
+from src.db.vector_store import get_retriever
 
-from src.config.settings import get_embedding_model, get_llm  # noqa: E402
-from src.db.vector_store import get_retriever  # noqa: E402
+# ragas (and the LangChain/transformers stack behind its metrics) is imported
+# inside the helpers that need it, so collecting this module stays cheap; the
+# evaluation_scores fixture skips the tests when it is not installed.
 
 # ---------------------------------------------------------------------------
 # Test dataset: 15 questions (5 per PDF) with ground truth from PDF content
 # ---------------------------------------------------------------------------
 
-EVAL_QUESTIONS = [
+EVAL_QUESTIONS = (
     # --- Refund Policy (5) ---
     {
         "question": "What is the refund window for monthly subscription plans?",
@@ -155,7 +146,7 @@ EVAL_QUESTIONS = [
         "question": "What is the minimum age requirement to create a TechCorp account?",
         "ground_truth": "You must be at least 18 years old to create an account.",
     },
-]
+)
 
 # Recommended thresholds (informational, not hard-gated)
 THRESHOLDS = {
@@ -167,76 +158,226 @@ THRESHOLDS = {
     "semantic_similarity": 0.7,
 }
 
+ANSWER_PROMPT = (
+    "Answer the following question based only on the provided context.\n\n"
+    "Context:\n{context}\n\n"
+    "Question: {question}\n\n"
+    "Answer:"
+)
+
+# Cap on in-flight LLM requests when generating answers (provider rate limits)
+MAX_CONCURRENCY = 8
+
+# With RAGAS_CACHE=1, generated answers are reused across runs from here
+ANSWER_CACHE_PATH = Path(__file__).with_name(".ragas_cache.sqlite")
+
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 
-def _build_retrieval_dataset():
-    """Retrieve contexts for each question and build a RAGAS dataset."""
-    retriever = get_retriever()
-    samples = []
-    for item in EVAL_QUESTIONS:
-        docs = retriever.invoke(item["question"])
-        contexts = [doc.page_content for doc in docs]
-        samples.append(
+def _retrieve_contexts():
+    """Retrieve context passages for every question in one batched call."""
+    questions = [item["question"] for item in EVAL_QUESTIONS]
+    docs_per_question = get_retriever().batch(questions)
+    return [[doc.page_content for doc in docs] for docs in docs_per_question]
+
+
+def _make_dataset(all_contexts, answers):
+    """Pair each question and ground truth with its contexts and answer."""
+    from ragas import EvaluationDataset, SingleTurnSample
+
+    rows = zip(EVAL_QUESTIONS, all_contexts, answers, strict=True)
+    return EvaluationDataset(
+        samples=[
             SingleTurnSample(
                 user_input=item["question"],
                 retrieved_contexts=contexts,
-                response="",  # not needed for retrieval-only metrics
+                response=answer,
                 reference=item["ground_truth"],
             )
+            for item, contexts, answer in rows
+        ]
+    )
+
+
+def _build_retrieval_dataset():
+    """Retrieve contexts for each question and build a RAGAS dataset."""
+    # Responses are not needed for retrieval-only metrics
+    return _make_dataset(_retrieve_contexts(), [""] * len(EVAL_QUESTIONS))
+
+
+def _invoke_batch(llm, prompts):
+    """Answer independent prompts concurrently (bounded) and return the text."""
+    responses = llm.batch(prompts, config={"max_concurrency": MAX_CONCURRENCY})
+    # get_llm() always returns a chat model, so every response is a message
+    return [response.content for response in responses]
+
+
+def _generate_answers(llm, prompts):
+    """Answer each prompt, reusing on-disk answers when RAGAS_CACHE=1.
+
+    Answers are keyed by sha256 of the model identity and the prompt, so a
+    changed prompt, retrieved context or model misses the cache.
+    """
+    if os.getenv("RAGAS_CACHE") != "1":
+        return _invoke_batch(llm, prompts)
+
+    model_id = "{}:{}:{}".format(
+        type(llm).__name__,
+        getattr(llm, "model_name", None) or getattr(llm, "model", None),
+        getattr(llm, "temperature", None),
+    )
+    keys = [
+        hashlib.sha256(f"{model_id}\n{prompt}".encode()).hexdigest()
+        for prompt in prompts
+    ]
+
+    with closing(sqlite3.connect(ANSWER_CACHE_PATH)) as conn, conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, answer TEXT)"
         )
-    return EvaluationDataset(samples=samples)
+        cached = {}
+        for key in keys:
+            row = conn.execute(
+                "SELECT answer FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                cached[key] = row[0]
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            fresh = _invoke_batch(llm, [prompts[i] for i in missing])
+            new = {keys[i]: answer for i, answer in zip(missing, fresh, strict=True)}
+            conn.executemany(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?)", new.items()
+            )
+            cached.update(new)
+
+    return [cached[key] for key in keys]
 
 
 def _build_answer_dataset():
     """Retrieve contexts, generate answers, and build a RAGAS dataset."""
-    retriever = get_retriever()
     llm = get_llm()
-    samples = []
-    for item in EVAL_QUESTIONS:
-        docs = retriever.invoke(item["question"])
-        contexts = [doc.page_content for doc in docs]
-
-        context_block = "\n\n".join(contexts)
-        prompt = (
-            "Answer the following question based only on the provided context.\n\n"
-            f"Context:\n{context_block}\n\n"
-            f"Question: {item['question']}\n\n"
-            "Answer:"
-        )
-        response = llm.invoke(prompt)
-        answer = response.content if hasattr(response, "content") else str(response)
+    all_contexts = _retrieve_contexts()
+    prompts = [
+        ANSWER_PROMPT.format(context="\n\n".join(contexts), question=item["question"])
+        for item, contexts in zip(EVAL_QUESTIONS, all_contexts, strict=True)
+    ]
 
-        samples.append(
-            SingleTurnSample(
-                user_input=item["question"],
-                retrieved_contexts=contexts,
-                response=answer,
-                reference=item["ground_truth"],
-            )
-        )
-    return EvaluationDataset(samples=samples)
+    return _make_dataset(all_contexts, _generate_answers(llm, prompts))
 
 
+# get_llm/get_embedding_model/get_retriever cache the underlying clients;
+# these also share one ragas wrapper across both evaluations.
+@functools.cache
 def _get_evaluator_llm():
+    from ragas.llms import LangchainLLMWrapper
+
     return LangchainLLMWrapper(get_llm())
 
 
+@functools.cache
 def _get_evaluator_embeddings():
+    from ragas.embeddings import LangchainEmbeddingsWrapper
+
     return LangchainEmbeddingsWrapper(get_embedding_model())
 
 
+@functools.cache
+def _metrics_module():
+    # Use legacy ragas.metrics (still functional) because ragas.metrics.collections
+    # requires InstructorLLM and is incompatible with LangchainLLMWrapper.
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import ragas.metrics
+
+    return ragas.metrics
+
+
+def _retrieval_metrics():
+    metrics = _metrics_module()
+    return [
+        metrics.LLMContextRecall(),
+        metrics.LLMContextPrecisionWithReference(),
+    ]
+
+
+def _answer_metrics():
+    metrics = _metrics_module()
+    return [
+        metrics.Faithfulness(),
+        metrics.FactualCorrectness(),
+        metrics.ResponseRelevancy(),
+        metrics.SemanticSimilarity(),
+    ]
+
+
 def _get_scores(result):
-    """Extract {metric_name: avg_score} dict from EvaluationResult."""
-    return dict(result._repr_dict)
+    """Extract {metric_name: avg_score} dict from EvaluationResult.
 
+    Averages the public per-sample result.scores, skipping NaN samples the
+    way ragas' own summary does; a metric with no valid samples is NaN.
+    """
+    valid = {}
+    for sample_scores in result.scores:
+        for metric_name, score in sample_scores.items():
+            samples = valid.setdefault(metric_name, [])
+            if not isnan(score):
+                samples.append(score)
+    return {name: fmean(samples) if samples else nan for name, samples in valid.items()}
 
-def _print_results(result, title):
-    """Print a formatted results table."""
+
+def _evaluate_retrieval():
+    """Score retrieval metrics only (no answer generation, cheaper)."""
+    from ragas import evaluate
+
+    result = evaluate(
+        dataset=_build_retrieval_dataset(),
+        metrics=_retrieval_metrics(),
+        llm=_get_evaluator_llm(),
+    )
+    return _get_scores(result)
+
+
+def _evaluate_answers():
+    """Score answer metrics only."""
+    from ragas import evaluate
+
+    result = evaluate(
+        dataset=_build_answer_dataset(),
+        metrics=_answer_metrics(),
+        llm=_get_evaluator_llm(),
+        embeddings=_get_evaluator_embeddings(),
+    )
+    return _get_scores(result)
+
+
+def _evaluate_all():
+    """Score retrieval and answer metrics in a single evaluate() pass.
+
+    The answer dataset also carries the retrieved contexts and references,
+    so it serves both metric groups. Returns (retrieval, answer) score dicts.
+    """
+    from ragas import evaluate
+
+    retrieval, answer = _retrieval_metrics(), _answer_metrics()
+    result = evaluate(
+        dataset=_build_answer_dataset(),
+        metrics=retrieval + answer,
+        llm=_get_evaluator_llm(),
+        embeddings=_get_evaluator_embeddings(),
+    )
     scores = _get_scores(result)
+    return (
+        {m.name: scores[m.name] for m in retrieval},
+        {m.name: scores[m.name] for m in answer},
+    )
+
+
+def _print_results(scores, title):
+    """Print a formatted results table."""
     print(f"\n{'=' * 60}")
     print(f"  {title}")
     print(f"{'=' * 60}")
@@ -249,65 +390,40 @@ def _print_results(result, title):
     print(f"{'=' * 60}\n")
 
 
+def _assert_scores_valid(scores):
+    # NaN (metric could not be computed) compares False, so it is allowed
+    negative = {name: score for name, score in scores.items() if score < 0.0}
+    assert not negative, f"Metrics returned negative scores: {negative}"
+
+
 # ---------------------------------------------------------------------------
 # Pytest tests
 # ---------------------------------------------------------------------------
 
 
+@pytest.fixture(scope="module")
+def evaluation_scores():
+    """(retrieval, answer) scores from one shared RAGAS evaluation."""
+    pytest.importorskip("ragas", reason="ragas package not installed")
+    return _evaluate_all()
+
+
 @pytest.mark.integration
 @pytest.mark.slow
-def test_retrieval_quality():
+def test_retrieval_quality(evaluation_scores):
     """Evaluate retrieval quality: did the retriever fetch relevant chunks?"""
-    dataset = _build_retrieval_dataset()
-    evaluator_llm = _get_evaluator_llm()
-
-    metrics = [
-        LLMContextRecall(),
-        LLMContextPrecisionWithReference(),
-    ]
-
-    result = evaluate(
-        dataset=dataset,
-        metrics=metrics,
-        llm=evaluator_llm,
-    )
-
-    _print_results(result, "Retrieval Quality")
-
-    for metric_name, score in _get_scores(result).items():
-        assert math.isnan(score) or score >= 0.0, (
-            f"{metric_name} returned a negative score: {score}"
-        )
+    scores, _ = evaluation_scores
+    _print_results(scores, "Retrieval Quality")
+    _assert_scores_valid(scores)
 
 
 @pytest.mark.integration
 @pytest.mark.slow
-def test_answer_quality():
+def test_answer_quality(evaluation_scores):
     """Evaluate answer quality: did the LLM produce correct answers?"""
-    dataset = _build_answer_dataset()
-    evaluator_llm = _get_evaluator_llm()
-    evaluator_embeddings = _get_evaluator_embeddings()
-
-    metrics = [
-        Faithfulness(),
-        FactualCorrectness(),
-        ResponseRelevancy(),
-        SemanticSimilarity(),
-    ]
-
-    result = evaluate(
-        dataset=dataset,
-        metrics=metrics,
-        llm=evaluator_llm,
-        embeddings=evaluator_embeddings,
-    )
-
-    _print_results(result, "Answer Quality")
-
-    for metric_name, score in _get_scores(result).items():
-        assert math.isnan(score) or score >= 0.0, (
-            f"{metric_name} returned a negative score: {score}"
-        )
+    _, scores = evaluation_scores
+    _print_results(scores, "Answer Quality")
+    _assert_scores_valid(scores)
 
 
 # ---------------------------------------------------------------------------
@@ -325,35 +441,17 @@ def main():
     )
     args = parser.parse_args()
 
-    if args.mode in ("retrieval", "both"):
+    if args.mode == "retrieval":
         print("\n>>> Building retrieval dataset ...")
-        dataset = _build_retrieval_dataset()
-        evaluator_llm = _get_evaluator_llm()
-        metrics = [
-            LLMContextRecall(),
-            LLMContextPrecisionWithReference(),
-        ]
-        result = evaluate(dataset=dataset, metrics=metrics, llm=evaluator_llm)
-        _print_results(result, "Retrieval Quality")
-
-    if args.mode in ("answer", "both"):
+        _print_results(_evaluate_retrieval(), "Retrieval Quality")
+    elif args.mode == "answer":
         print("\n>>> Building answer dataset (generating LLM responses) ...")
-        dataset = _build_answer_dataset()
-        evaluator_llm = _get_evaluator_llm()
-        evaluator_embeddings = _get_evaluator_embeddings()
-        metrics = [
-            Faithfulness(),
-            FactualCorrectness(),
-            ResponseRelevancy(),
-            SemanticSimilarity(),
-        ]
-        result = evaluate(
-            dataset=dataset,
-            metrics=metrics,
-            llm=evaluator_llm,
-            embeddings=evaluator_embeddings,
-        )
-        _print_results(result, "Answer Quality")
+        _print_results(_evaluate_answers(), "Answer Quality")
+    else:
+        print("\n>>> Building answer dataset (generating LLM responses) ...")
+        retrieval_scores, answer_scores = _evaluate_all()
+        _print_results(retrieval_scores, "Retrieval Quality")
+        _print_results(answer_scores, "Answer Quality")
 
     print("Done.")
 
@@ -3,39 +3,50 @@
 import pytest
 from langchain_community.utilities import SQLDatabase
 
+from src.db.sql_database import get_sql_database
+from src.tools.sql_tools import get_db_schema
 
-class TestSQLTools:
-    """Test SQL database tools."""
+# Share one worker (and its seeded template DB) under --dist=loadgroup
+pytestmark = pytest.mark.xdist_group("sqlite_db")
 
-    def test_get_sql_tools(self, fake_llm, temp_sqlite_db):
-        from src.tools.sql_tools import get_sql_tools
 
-        db = SQLDatabase.from_uri(f"sqlite:///{temp_sqlite_db}")
-        tools = get_sql_tools(fake_llm, db=db)
+class TestSQLTools:
+    """Test SQL database tools."""
 
+    def test_get_sql_tools(self, sql_tools):
         # Only sql_db_query is returned; schema is embedded in the prompt
         # and query_checker (hidden LLM call) is removed.
-        assert len(tools) == 1
-        assert tools[0].name == "sql_db_query"
+        assert len(sql_tools) == 1
+        assert sql_tools[0].name == "sql_db_query"
 
-    def test_get_db_schema(self, fake_llm, temp_sqlite_db):
-        from src.tools.sql_tools import get_db_schema
-
-        db = SQLDatabase.from_uri(f"sqlite:///{temp_sqlite_db}")
-        schema = get_db_schema(db=db)
+    def test_get_db_schema(self, sql_db):
+        schema = get_db_schema(db=sql_db)
 
         assert "customers" in schema
         assert "products" in schema
         assert "tickets" in schema
 
-    def test_query_tool(self, fake_llm, temp_sqlite_db):
-        from src.tools.sql_tools import get_sql_tools
+    def test_get_db_schema_caches_default_database(self, temp_sqlite_db, monkeypatch):
+        from src.tools import sql_tools
+
+        calls = []
+        monkeypatch.setattr(sql_tools, "get_sqlite_path", lambda: temp_sqlite_db)
+        monkeypatch.setattr(
+            sql_tools,
+            "get_sql_database",
+            lambda path: (
+                calls.append(path) or SQLDatabase.from_uri(f"sqlite:///{path}")
+            ),
+        )
+        sql_tools._get_cached_schema.cache_clear()
 
-        db = SQLDatabase.from_uri(f"sqlite:///{temp_sqlite_db}")
-        tools = get_sql_tools(fake_llm, db=db)
+        first = sql_tools.get_db_schema()
+        assert sql_tools.get_db_schema() is first
+        assert calls == [temp_sqlite_db]
+        sql_tools._get_cached_schema.cache_clear()
 
-        query_tool = next(t for t in tools if t.name == "sql_db_query")
-        result = query_tool.invoke("SELECT COUNT(*) FROM customers")
+    def test_query_tool(self, sql_query_tool):
+        result = sql_query_tool.invoke("SELECT COUNT(*) FROM customers")
 
         assert "3" in result
 
@@ -44,13 +55,9 @@ class TestSQLDatabase:
     """Test SQL database connection."""
 
     def test_get_sql_database(self, temp_sqlite_db):
-        from src.db.sql_database import get_sql_database
-
         db = get_sql_database(db_path=temp_sqlite_db)
         assert db is not None
 
     def test_get_sql_database_missing(self):
-        from src.db.sql_database import get_sql_database
-
         with pytest.raises(FileNotFoundError):
             get_sql_database(db_path="nonexistent.db")
@@ -34,26 +34,17 @@ class TestRouteQuery:
 class TestRouteFunction:
     """Test the route_question function."""
 
-    def test_route_to_sql_agent(self):
+    @pytest.mark.parametrize(
+        ("category", "expected"),
+        [
+            ("sql_agent", "sql_agent"),
+            ("rag_agent", "rag_agent"),
+            ("general", "general_agent"),
+            (None, "general_agent"),
+        ],
+    )
+    def test_route_question(self, category, expected):
         from src.graph import route_question
 
-        state = {"query_category": "sql_agent"}
-        assert route_question(state) == "sql_agent"
-
-    def test_route_to_rag_agent(self):
-        from src.graph import route_question
-
-        state = {"query_category": "rag_agent"}
-        assert route_question(state) == "rag_agent"
-
-    def test_route_to_general(self):
-        from src.graph import route_question
-
-        state = {"query_category": "general"}
-        assert route_question(state) == "general_agent"
-
-    def test_route_default_general(self):
-        from src.graph import route_question
-
-        state = {}
-        assert route_question(state) == "general_agent"
+        state = {} if category is None else {"query_category": category}
+        assert route_question(state) == expected